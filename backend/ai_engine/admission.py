@@ -0,0 +1,140 @@
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Deque
+
+
+JUDGE_MAX_IN_FLIGHT = max(1, int(os.getenv("AI_JUDGE_MAX_IN_FLIGHT", "4")))
+JUDGE_MAX_QUEUE = max(0, int(os.getenv("AI_JUDGE_MAX_QUEUE", "16")))
+JUDGE_MAX_QUEUE_WAIT_SECONDS = max(0.0, float(os.getenv("AI_JUDGE_MAX_QUEUE_WAIT_SECONDS", "20")))
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded FIFO admission in front of the analysis stage.
+
+    At most ``max_in_flight`` holders run at once and at most ``max_queue``
+    wait. A full queue is rejected immediately with 429; a request that waits
+    longer than ``max_wait`` seconds is rejected with 503. Both carry a
+    Retry-After estimate from recent service times.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = JUDGE_MAX_IN_FLIGHT,
+        max_queue: int = JUDGE_MAX_QUEUE,
+        max_wait: float = JUDGE_MAX_QUEUE_WAIT_SECONDS,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._service_seconds = 2.0
+        self.admitted = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        self.last_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._total_wait_seconds = 0.0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _retry_after(self) -> int:
+        backlog = (self.queued + 1) / float(self.max_in_flight)
+        return max(1, int(math.ceil(backlog * self._service_seconds)))
+
+    def _record_wait(self, waited: float):
+        self.admitted += 1
+        self.last_wait_seconds = waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        self._total_wait_seconds += waited
+
+    async def acquire(self) -> float:
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            self._record_wait(0.0)
+            return time.monotonic()
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected_full += 1
+            raise AdmissionRejected(429, "Judge is busy; queue is full.", self._retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            if not future.done():
+                future.cancel()
+                self._discard(future)
+                self.rejected_timeout += 1
+                raise AdmissionRejected(
+                    503,
+                    "Judge is busy; timed out waiting for a slot.",
+                    self._retry_after(),
+                )
+        except BaseException:
+            if future.done() and not future.cancelled():
+                # A slot was handed over just as we were cancelled; pass it on.
+                self._hand_over()
+            else:
+                future.cancel()
+                self._discard(future)
+            raise
+
+        self._record_wait(time.monotonic() - started)
+        return time.monotonic()
+
+    def _discard(self, future: asyncio.Future):
+        try:
+            self._waiters.remove(future)
+        except ValueError:
+            pass
+
+    def _hand_over(self):
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(True)
+                return
+        self._in_flight -= 1
+
+    def release(self, admitted_at: float):
+        held = max(0.0, time.monotonic() - admitted_at)
+        self._service_seconds = (0.8 * self._service_seconds) + (0.2 * held)
+        self._hand_over()
+
+    def snapshot(self) -> dict:
+        return {
+            "in_flight": self._in_flight,
+            "queued": self.queued,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "max_queue_wait_seconds": self.max_wait,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_full,
+            "rejected_wait_timeout": self.rejected_timeout,
+            "last_wait_seconds": round(self.last_wait_seconds, 4),
+            "max_wait_seconds": round(self.max_wait_seconds, 4),
+            "avg_wait_seconds": round(self._total_wait_seconds / self.admitted, 4)
+            if self.admitted
+            else 0.0,
+            "avg_service_seconds": round(self._service_seconds, 3),
+        }
@@ -0,0 +1,161 @@
+import os
+from typing import NamedTuple
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba ships with librosa; keep a slow path just in case.
+    def njit(*args, **kwargs):
+        def wrap(func):
+            return func
+
+        return wrap
+
+
+DTW_BAND_RATIO = max(0.01, float(os.getenv("AI_DTW_BAND_RATIO", "0.15")))
+DTW_MIN_BAND = max(2, int(os.getenv("AI_DTW_MIN_BAND", "16")))
+DTW_COST_CAP_CENTS = 1200.0
+
+_STEP_DIAG = 0
+_STEP_UP = 1
+_STEP_LEFT = 2
+
+
+class PitchAlignment(NamedTuple):
+    accuracy: float
+    path: np.ndarray  # (K, 2) pairs of (reference_index, user_index)
+
+
+def hz_to_cents(values: np.ndarray) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    return 1200.0 * np.log2(np.maximum(values, 1e-6) / 440.0)
+
+
+@njit(cache=True, nogil=True)
+def _banded_dtw(ref, user, lows, band, cost_cap):
+    n = ref.size
+    m = user.size
+    width = 2 * band + 1
+    # Only two cost rows are live; the step matrix is int8, so memory is O(N * band).
+    prev = np.full(width, np.inf)
+    curr = np.full(width, np.inf)
+    steps = np.zeros((n, width), dtype=np.int8)
+    last_column = np.full(n, np.inf)
+
+    for i in range(n):
+        lo = lows[i]
+        prev_lo = lows[i - 1] if i > 0 else 0
+        for k in range(width):
+            curr[k] = np.inf
+            j = lo + k
+            if j < 0 or j >= m:
+                continue
+            d = abs(ref[i] - user[j])
+            if d > cost_cap:
+                d = cost_cap
+            if i == 0 and j == 0:
+                curr[k] = d
+                continue
+
+            best = np.inf
+            step = _STEP_DIAG
+            if i > 0:
+                kp = j - prev_lo
+                if 0 < kp <= width and prev[kp - 1] < best:
+                    best = prev[kp - 1]
+                    step = _STEP_DIAG
+                if 0 <= kp < width and prev[kp] < best:
+                    best = prev[kp]
+                    step = _STEP_UP
+            if k > 0 and curr[k - 1] < best:
+                best = curr[k - 1]
+                step = _STEP_LEFT
+            if best < np.inf:
+                curr[k] = d + best
+                steps[i, k] = step
+        if 0 <= m - 1 - lo < width:
+            last_column[i] = curr[m - 1 - lo]
+        for k in range(width):
+            prev[k] = curr[k]
+
+    # Open end within one band of the corner, by mean step cost; ties go to
+    # the corner so a short, flat prefix cannot win.
+    end_i = n - 1
+    end_j = m - 1
+    end_cost = np.inf
+    for i in range(n - 1, max(-1, n - 2 - band), -1):
+        normalised = last_column[i] / (i + m)
+        if normalised < end_cost:
+            end_cost = normalised
+            end_i = i
+            end_j = m - 1
+    last_lo = lows[n - 1]
+    for k in range(width - 1, -1, -1):
+        j = last_lo + k
+        if max(0, m - 1 - band) <= j < m:
+            normalised = prev[k] / (n + j)
+            if normalised < end_cost:
+                end_cost = normalised
+                end_i = n - 1
+                end_j = j
+
+    path = np.zeros((n + m, 2), dtype=np.int64)
+    count = 0
+    i = end_i
+    j = end_j
+    while True:
+        path[count, 0] = i
+        path[count, 1] = j
+        count += 1
+        if i == 0 and j == 0:
+            break
+        step = steps[i, j - lows[i]]
+        if step == _STEP_DIAG:
+            i -= 1
+            j -= 1
+        elif step == _STEP_UP:
+            i -= 1
+        else:
+            j -= 1
+        if i < 0 or j < 0:
+            break
+    return path[:count][::-1]
+
+
+def _band_width(n: int, m: int, band_ratio: float) -> int:
+    band = max(DTW_MIN_BAND, int(round(band_ratio * max(n, m))))
+    # Consecutive band centres must overlap or the band disconnects.
+    stride = int(np.ceil(max(n, m) / max(1, min(n, m))))
+    return max(band, stride + 1)
+
+
+def align_pitch(
+    reference_pitch: np.ndarray,
+    user_pitch: np.ndarray,
+    tolerance_cents: float = 100.0,
+    band_ratio: float = DTW_BAND_RATIO,
+) -> PitchAlignment:
+    if reference_pitch.size == 0 or user_pitch.size == 0:
+        return PitchAlignment(0.0, np.zeros((0, 2), dtype=np.int64))
+
+    # A take usually covers only part of the reference (or vice versa); keep the
+    # overlapping span plus band slack and let the path end where either runs out.
+    slack = 1.0 + band_ratio
+    ref = hz_to_cents(reference_pitch[: int(np.ceil(user_pitch.size * slack))])
+    user = hz_to_cents(user_pitch[: int(np.ceil(ref.size * slack))])
+
+    n, m = ref.size, user.size
+    band = _band_width(n, m, band_ratio)
+    centres = (np.arange(n, dtype=np.int64) * (m - 1)) // max(1, n - 1)
+    lows = centres - band
+    path = _banded_dtw(ref, user, lows, band, DTW_COST_CAP_CENTS)
+
+    # Score each covered reference frame by its best-matched user frame so the
+    # path cannot inflate accuracy by lingering on one well-sung note.
+    covered = int(path[-1, 0]) + 1
+    errors = np.abs(ref[path[:, 0]] - user[path[:, 1]])
+    best = np.full(covered, np.inf)
+    np.minimum.at(best, path[:, 0], errors)
+    accuracy = float(np.count_nonzero(best <= tolerance_cents)) / float(covered) * 100.0
+    return PitchAlignment(round(accuracy, 2), path)
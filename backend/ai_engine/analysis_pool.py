@@ -0,0 +1,221 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Optional, Set
+
+from fastapi.concurrency import run_in_threadpool
+
+from audio_analysis import run_analysis_warmup
+from logging_setup import configure_logging, get_logger
+
+ANALYSIS_EXECUTOR = os.getenv("AI_ANALYSIS_EXECUTOR", "thread").strip().lower()
+ANALYSIS_WORKERS = max(1, int(os.getenv("AI_ANALYSIS_WORKERS", str(max(1, (os.cpu_count() or 2) - 1)))))
+ANALYSIS_MAX_TASKS_PER_WORKER = max(1, int(os.getenv("AI_ANALYSIS_MAX_TASKS_PER_WORKER", "200")))
+ANALYSIS_MAX_WORKER_RSS_MB = float(os.getenv("AI_ANALYSIS_MAX_WORKER_RSS_MB", "1024"))
+
+logger = get_logger("analysis_pool")
+
+
+def _current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024.0 * 1024.0)
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        # ru_maxrss is a peak (KiB on Linux), which is still a fair recycle signal.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _worker_init(warmup_dir: str):
+    import librosa  # noqa: F401
+
+    configure_logging()
+    try:
+        run_analysis_warmup(Path(warmup_dir))
+    except Exception as exc:
+        logger.warning("Analysis worker warmup skipped: %s", exc)
+
+
+def _worker_ready() -> int:
+    return os.getpid()
+
+
+def _run_task(func, args, kwargs):
+    return func(*args, **kwargs), _current_rss_mb()
+
+
+class AnalysisPool:
+    """Runs CPU-bound analysis in pre-warmed worker processes.
+
+    The whole pool is rotated after ``max_tasks`` tasks per worker on
+    average, or when a worker reports RSS above ``max_rss_mb``. A rotation
+    spawns and warms the replacement first and only then swaps it in, so no
+    request pays for a worker's librosa import and warmup. Any failure to
+    start or a broken pool drops that call back to the threadpool, so the
+    API keeps serving.
+    """
+
+    def __init__(
+        self,
+        mode: str = ANALYSIS_EXECUTOR,
+        workers: int = ANALYSIS_WORKERS,
+        max_tasks: int = ANALYSIS_MAX_TASKS_PER_WORKER,
+        max_rss_mb: float = ANALYSIS_MAX_WORKER_RSS_MB,
+        warmup_dir: Optional[Path] = None,
+    ):
+        self.mode = mode if mode in {"thread", "process"} else "thread"
+        self.workers = workers
+        self.max_tasks = max_tasks
+        self.max_rss_mb = max_rss_mb
+        self.warmup_dir = Path(warmup_dir) if warmup_dir else Path.cwd()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._tasks = 0
+        self._rotating = False
+        self._background: Set[asyncio.Task] = set()
+        self.recycled = 0
+        self.recycled_task_limit = 0
+        self.recycled_rss = 0
+        self.fallbacks = 0
+
+    @property
+    def uses_processes(self) -> bool:
+        return self.mode == "process"
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn: librosa/numba state must not be inherited through fork.
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_worker_init,
+            initargs=(str(self.warmup_dir),),
+        )
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if not self.uses_processes:
+            return None
+        with self._lock:
+            if self._executor is None:
+                try:
+                    self._executor = self._new_executor()
+                except Exception as exc:
+                    logger.warning("Analysis process pool unavailable, using threads: %s", exc)
+                    self.mode = "thread"
+                    return None
+            return self._executor
+
+    def _retire(self, executor: ProcessPoolExecutor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self._tasks = 0
+                self.recycled += 1
+        # In-flight tasks on the old pool finish; new work goes to a fresh one.
+        executor.shutdown(wait=False, cancel_futures=False)
+
+    async def _warm(self, executor: ProcessPoolExecutor):
+        # Submitting one task per worker spawns and warms all of them now.
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(executor, _worker_ready) for _ in range(self.workers))
+        )
+
+    async def _rotate(self, old: ProcessPoolExecutor, reason: str):
+        with self._lock:
+            if self._rotating or self._executor is not old:
+                return
+            self._rotating = True
+        try:
+            replacement = self._new_executor()
+            try:
+                await self._warm(replacement)
+            except Exception as exc:
+                replacement.shutdown(wait=False, cancel_futures=True)
+                logger.warning("Analysis pool rotation failed; keeping current workers: %s", exc)
+                return
+            with self._lock:
+                self._executor = replacement
+                self._tasks = 0
+                self.recycled += 1
+                if reason == "task_limit":
+                    self.recycled_task_limit += 1
+                else:
+                    self.recycled_rss += 1
+            # In-flight tasks on the old pool finish; new work already goes to the warm one.
+            old.shutdown(wait=False, cancel_futures=False)
+            logger.info("Analysis process pool rotated (%s).", reason)
+        finally:
+            with self._lock:
+                self._rotating = False
+
+    def _spawn(self, coro):
+        # Holds a reference until done, so a rotation is never collected midway.
+        task = asyncio.get_running_loop().create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background_done)
+
+    def _background_done(self, task: asyncio.Task):
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            exc = task.exception()
+            logger.error("Analysis pool maintenance failed: %s", exc, exc_info=exc)
+
+    async def start(self):
+        executor = self._get_executor()
+        if executor is None:
+            return
+        try:
+            await self._warm(executor)
+            logger.info("Analysis process pool ready with %d workers.", self.workers)
+        except Exception as exc:
+            logger.warning("Analysis process pool failed to start, using threads: %s", exc)
+            self._retire(executor)
+            self.mode = "thread"
+
+    async def run(self, func, *args, **kwargs):
+        executor = self._get_executor()
+        if executor is None:
+            return await run_in_threadpool(func, *args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        try:
+            result, rss_mb = await loop.run_in_executor(executor, _run_task, func, args, kwargs)
+        except BrokenProcessPool as exc:
+            logger.warning("Analysis worker died; retrying in a thread: %s", exc)
+            self.fallbacks += 1
+            self._retire(executor)
+            # Warm the replacement now rather than on the next request.
+            self._spawn(self.start())
+            return await run_in_threadpool(func, *args, **kwargs)
+
+        with self._lock:
+            self._tasks += 1
+            task_limit_reached = self._tasks >= self.max_tasks * self.workers
+        if self.max_rss_mb > 0 and rss_mb > self.max_rss_mb:
+            logger.info("Analysis worker at %.0f MB; recycling process pool.", rss_mb)
+            self._spawn(self._rotate(executor, "rss"))
+        elif task_limit_reached:
+            self._spawn(self._rotate(executor, "task_limit"))
+        return result
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def snapshot(self) -> dict:
+        return {
+            "mode": self.mode,
+            "workers": self.workers if self.uses_processes else 0,
+            "recycled": self.recycled,
+            "recycled_task_limit": self.recycled_task_limit,
+            "recycled_rss": self.recycled_rss,
+            "fallbacks": self.fallbacks,
+        }
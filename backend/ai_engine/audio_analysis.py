@@ -1,10 +1,25 @@
+import io
 import os
-from typing import Optional
+import tempfile
+import time
+import uuid
+import wave
+from functools import cached_property
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
 
 import librosa
 import numpy as np
 import soundfile as sf
 
+from alignment import align_pitch
+from ffmpeg_decode import ffmpeg_available, ffmpeg_decode
+from logging_setup import get_logger
+from pitch_yin import yin_pitch
+from resampling import FAST_RESAMPLE_QUALITY, RESAMPLE_QUALITY, resample
+
+logger = get_logger("audio")
+
 
 def _env_int(name: str, default: int) -> int:
     raw = os.getenv(name, str(default))
@@ -15,13 +30,18 @@ def _env_int(name: str, default: int) -> int:
 
 
 USE_PYIN = os.getenv("AI_USE_PYIN", "0").strip().lower() in {"1", "true", "yes", "on"}
+PITCH_BACKENDS = ("piptrack", "pyin", "yin")
+PITCH_BACKEND = os.getenv("AI_PITCH_BACKEND", "pyin" if USE_PYIN else "piptrack").strip().lower()
+if PITCH_BACKEND not in PITCH_BACKENDS:
+    PITCH_BACKEND = "piptrack"
 ANALYSIS_SAMPLE_RATE = max(8000, _env_int("AI_ANALYSIS_SAMPLE_RATE", 16000))
-TIMING_SAMPLE_RATE = max(8000, _env_int("AI_TIMING_SAMPLE_RATE", 16000))
 DEFAULT_PITCH_HOP_LENGTH = max(256, _env_int("AI_PITCH_HOP_LENGTH", 768))
 FAST_PITCH_HOP_LENGTH = max(
     DEFAULT_PITCH_HOP_LENGTH,
     _env_int("AI_FAST_PITCH_HOP_LENGTH", 1024),
 )
+ANALYSIS_N_FFT = 2048
+PITCH_TOLERANCE_CENTS = max(1.0, float(os.getenv("AI_PITCH_TOLERANCE_CENTS", "100")))
 
 
 def _is_missing_backend_error(exc: Exception) -> bool:
@@ -37,31 +57,149 @@ def _is_missing_backend_error(exc: Exception) -> bool:
     )
 
 
-def _load_mono_audio(file_path: str, target_sr: Optional[int] = None):
+PCM_FORMATS = {"f32le": "<f4", "s16le": "<i2"}
+
+
+class AudioTooLongError(ValueError):
+    pass
+
+
+class DecodedAudio(NamedTuple):
+    samples: np.ndarray  # mono float32
+    sample_rate: int
+
+
+# A path on disk, the encoded bytes of an upload held in memory, or raw PCM.
+AudioSource = Union[str, os.PathLike, bytes, bytearray, memoryview, DecodedAudio]
+
+
+def decode_pcm(data, sample_format: str = "f32le") -> np.ndarray:
+    # Little-endian mono PCM; float32 input is a read-only view of ``data``.
+    dtype = PCM_FORMATS.get(sample_format)
+    if dtype is None:
+        raise ValueError(f"Unsupported PCM format '{sample_format}'.")
+    width = np.dtype(dtype).itemsize
+    if len(data) % width:
+        raise ValueError(f"PCM data is not a whole number of {sample_format} samples.")
+    samples = np.frombuffer(data, dtype=dtype)
+    if samples.dtype.kind == "i":
+        return np.multiply(samples, 1.0 / 32768.0, dtype=np.float32)
+    return samples.astype(np.float32, copy=False)
+
+
+def _is_in_memory(source: AudioSource) -> bool:
+    return isinstance(source, (bytes, bytearray, memoryview))
+
+
+def _soundfile_input(source: AudioSource):
+    # soundfile treats ``bytes`` as a file name; BytesIO shares the buffer, no copy.
+    if _is_in_memory(source):
+        return io.BytesIO(source)
+    return os.fspath(source)
+
+
+def _source_label(source: AudioSource) -> str:
+    if _is_in_memory(source):
+        return f"<{len(source)} bytes in memory>"
+    return os.path.basename(os.fspath(source))
+
+
+def _check_length(frames: int, sr: int, max_seconds: Optional[float]):
+    if max_seconds and frames > max_seconds * sr:
+        raise AudioTooLongError(f"Audio exceeds {int(max_seconds)} seconds.")
+
+
+def _soundfile_load(source: AudioSource, max_seconds: Optional[float]):
+    with sf.SoundFile(_soundfile_input(source)) as sound:
+        sr = int(sound.samplerate)
+        # The header length rejects long files before any sample is decoded.
+        _check_length(sound.frames, sr, max_seconds)
+        frames = int(max_seconds * sr) + 1 if max_seconds else -1
+        audio = sound.read(frames=frames, dtype="float32", always_2d=True)
+    # Headers can lie (streamed WAV); the bounded read is the real check.
+    _check_length(audio.shape[0], sr, max_seconds)
+    if audio.shape[1] == 1:
+        return audio[:, 0], sr
+    return np.mean(audio, axis=1, dtype=np.float32), sr
+
+
+def _ffmpeg_load(source: AudioSource, target_sr: int, max_seconds: Optional[float]):
+    # ffmpeg downmixes and resamples while decoding: s16 at the analysis rate.
+    max_samples = int(max_seconds * target_sr) if max_seconds else None
+    pcm = ffmpeg_decode(source, target_sr, max_samples)
+    _check_length(len(pcm) // 2, target_sr, max_seconds)
+    return decode_pcm(pcm, "s16le"), int(target_sr)
+
+
+def _librosa_load(source: AudioSource, max_seconds: Optional[float] = None):
+    # Native rate; resampling goes through our own layer like every other path.
+    # ``duration`` stops the decoder just past the limit instead of at the end.
+    duration = max_seconds + 1.0 if max_seconds else None
+    if not _is_in_memory(source):
+        audio, sr = librosa.load(os.fspath(source), sr=None, mono=True, duration=duration)
+    else:
+        # audioread/ffmpeg only read from paths; spill this one upload to disk.
+        with tempfile.NamedTemporaryFile(suffix=".audio") as spill:
+            spill.write(source)
+            spill.flush()
+            audio, sr = librosa.load(spill.name, sr=None, mono=True, duration=duration)
+    _check_length(audio.size, sr, max_seconds)
+    return audio, sr
+
+
+def _load_mono_audio(
+    file_path: AudioSource,
+    target_sr: Optional[int] = None,
+    resample_quality: str = RESAMPLE_QUALITY,
+    max_seconds: Optional[float] = None,
+):
+    if isinstance(file_path, DecodedAudio):
+        audio, sr = file_path
+        _check_length(audio.size, sr, max_seconds)
+        if target_sr and sr != target_sr:
+            audio = resample(audio, sr, target_sr, resample_quality)
+            sr = target_sr
+        return audio, int(sr)
+
     try:
         # Try soundfile first (fastest, supports WAV/FLAC)
-        audio, sr = sf.read(file_path, dtype="float32")
-        if audio.ndim > 1:
-            audio = np.mean(audio, axis=1)
+        audio, sr = _soundfile_load(file_path, max_seconds)
         if target_sr and sr != target_sr:
-            audio = librosa.resample(audio, orig_sr=sr, target_sr=target_sr)
+            audio = resample(audio, sr, target_sr, resample_quality)
             sr = target_sr
-        return audio.astype(np.float32), int(sr)
+        return audio.astype(np.float32, copy=False), int(sr)
+    except AudioTooLongError:
+        raise
     except Exception as exc:
-        print(f"DEBUG: soundfile.read failed for {file_path}: {exc}")
-        # Fallback to librosa (needs ffmpeg for WEBM/MP3)
+        logger.debug("soundfile.read failed for %s: %s", _source_label(file_path), exc)
+
+    if target_sr and ffmpeg_available():
+        # Compressed formats (m4a/webm/opus): one pipe, no float64 round trip.
         try:
-            audio, sr = librosa.load(file_path, sr=target_sr, mono=True)
-            return audio.astype(np.float32), int(sr)
-        except Exception as inner_exc:
-            # Check for common missing backend/format issues
-            err_msg = str(inner_exc).lower()
-            if _is_missing_backend_error(inner_exc) or "sndfile" in err_msg:
-                raise RuntimeError(
-                    f"Could not read audio file '{os.path.basename(file_path)}'. "
-                    "Make sure it is a valid WAV file, or install ffmpeg for other formats."
-                ) from inner_exc
+            return _ffmpeg_load(file_path, target_sr, max_seconds)
+        except AudioTooLongError:
             raise
+        except Exception as exc:
+            logger.debug("ffmpeg decode failed for %s: %s", _source_label(file_path), exc)
+
+    # Fallback to librosa (needs ffmpeg for WEBM/MP3)
+    try:
+        audio, sr = _librosa_load(file_path, max_seconds)
+        if target_sr and sr != target_sr:
+            audio = resample(audio, sr, target_sr, resample_quality)
+            sr = target_sr
+        return audio.astype(np.float32, copy=False), int(sr)
+    except AudioTooLongError:
+        raise
+    except Exception as inner_exc:
+        # Check for common missing backend/format issues
+        err_msg = str(inner_exc).lower()
+        if _is_missing_backend_error(inner_exc) or "sndfile" in err_msg:
+            raise RuntimeError(
+                f"Could not read audio file '{_source_label(file_path)}'. "
+                "Make sure it is a valid WAV file, or install ffmpeg for other formats."
+            ) from inner_exc
+        raise
 
 
 def _moving_average(values: np.ndarray, window: int) -> np.ndarray:
@@ -78,66 +216,183 @@ def _moving_average(values: np.ndarray, window: int) -> np.ndarray:
     return np.convolve(padded, kernel, mode="valid").astype(np.float32, copy=False)
 
 
-def get_audio_duration(file_path: str) -> float:
-    try:
-        # Use soundfile info for fast, backend-less duration for WAV/FLAC
-        info = sf.info(file_path)
-        return float(info.duration)
-    except Exception:
-        try:
-            # Fallback for other formats if ffmpeg is available
-            return float(librosa.get_duration(path=file_path))
-        except Exception:
-            # Final fallback: load it and check length
-            audio, sr = _load_mono_audio(file_path)
-            return float(librosa.get_duration(y=audio, sr=sr))
+def decode_audio(
+    source: AudioSource,
+    target_sr: Optional[int] = ANALYSIS_SAMPLE_RATE,
+    resample_quality: str = RESAMPLE_QUALITY,
+    max_seconds: Optional[float] = None,
+) -> DecodedAudio:
+    """Decode once, stopping as soon as ``max_seconds`` is exceeded.
+
+    Raises ``AudioTooLongError`` for clips over the limit. The result can be
+    handed straight to ``generate_stats`` without a second decode.
+    """
+    audio, sr = _load_mono_audio(source, target_sr, resample_quality, max_seconds)
+    return DecodedAudio(audio, sr)
+
+
+class ClipFeatures(NamedTuple):
+    pitch: np.ndarray
+    onset_envelope: np.ndarray
+    tempo: float
+
+
+class AnalysisSession:
+    """One decoded clip plus a single magnitude STFT shared by every metric.
+
+    Features are computed lazily, so a take judged without a reference never
+    pays for onset strength or tempo estimation.
+    """
+
+    def __init__(
+        self,
+        audio: np.ndarray,
+        sr: int,
+        hop_length: int = DEFAULT_PITCH_HOP_LENGTH,
+        n_fft: int = ANALYSIS_N_FFT,
+        pitch_backend: str = PITCH_BACKEND,
+    ):
+        self.audio = np.asarray(audio, dtype=np.float32)
+        self.sr = int(sr)
+        self.hop_length = int(hop_length)
+        self.n_fft = int(n_fft)
+        self.pitch_backend = pitch_backend
+
+    @classmethod
+    def from_file(
+        cls,
+        file_path: AudioSource,
+        hop_length: int = DEFAULT_PITCH_HOP_LENGTH,
+        target_sr: Optional[int] = ANALYSIS_SAMPLE_RATE,
+        pitch_backend: str = PITCH_BACKEND,
+        resample_quality: str = RESAMPLE_QUALITY,
+        max_seconds: Optional[float] = None,
+    ) -> "AnalysisSession":
+        audio, sr = _load_mono_audio(
+            file_path,
+            target_sr=target_sr,
+            resample_quality=resample_quality,
+            max_seconds=max_seconds,
+        )
+        return cls(audio, sr, hop_length=hop_length, pitch_backend=pitch_backend)
+
+    @cached_property
+    def spectrogram(self) -> np.ndarray:
+        return np.abs(
+            librosa.stft(self.audio, n_fft=self.n_fft, hop_length=self.hop_length)
+        )
+
+    @cached_property
+    def pitch_contour(self) -> np.ndarray:
+        # Per-frame f0 in Hz; unvoiced frames are 0.
+        if self.pitch_backend == "yin":
+            f0, _ = yin_pitch(self.audio, self.sr, hop_length=self.hop_length)
+            return np.nan_to_num(f0, nan=0.0)
+
+        if self.pitch_backend == "pyin":
+            try:
+                f0, _, _ = librosa.pyin(
+                    self.audio,
+                    sr=self.sr,
+                    fmin=librosa.note_to_hz("C2"),
+                    fmax=librosa.note_to_hz("C6"),
+                    hop_length=self.hop_length,
+                )
+                if np.isfinite(f0).any():
+                    return np.nan_to_num(f0, nan=0.0).astype(np.float32)
+            except Exception:
+                pass
+
+        pitches, magnitudes = librosa.piptrack(
+            S=self.spectrogram,
+            sr=self.sr,
+            n_fft=self.n_fft,
+            hop_length=self.hop_length,
+        )
+        if pitches.size == 0:
+            return np.array([], dtype=np.float32)
+
+        frame_indices = np.argmax(magnitudes, axis=0)
+        frame_positions = np.arange(pitches.shape[1])
+        return pitches[frame_indices, frame_positions].astype(np.float32, copy=False)
+
+    @cached_property
+    def pitch(self) -> np.ndarray:
+        contour = self.pitch_contour
+        return contour[contour > 0]
+
+    @cached_property
+    def onset_envelope(self) -> np.ndarray:
+        # Same log-power mel input librosa builds internally, but from our STFT.
+        mel = librosa.feature.melspectrogram(
+            S=self.spectrogram**2,
+            sr=self.sr,
+            n_fft=self.n_fft,
+        )
+        onset = librosa.onset.onset_strength(
+            S=librosa.power_to_db(mel),
+            sr=self.sr,
+            n_fft=self.n_fft,
+            hop_length=self.hop_length,
+        )
+        return onset.astype(np.float32, copy=False)
+
+    @cached_property
+    def tempo(self) -> float:
+        if self.onset_envelope.size == 0:
+            return 0.0
+        tempo = librosa.feature.tempo(
+            onset_envelope=self.onset_envelope,
+            sr=self.sr,
+            hop_length=self.hop_length,
+        )
+        return float(np.atleast_1d(tempo)[0])
+
+    def features(self) -> ClipFeatures:
+        return ClipFeatures(
+            pitch=self.pitch,
+            onset_envelope=self.onset_envelope,
+            tempo=self.tempo,
+        )
+
+
+def analysis_hop_length(fast_mode: bool = False) -> int:
+    return FAST_PITCH_HOP_LENGTH if fast_mode else DEFAULT_PITCH_HOP_LENGTH
+
+
+def analysis_resample_quality(fast_mode: bool = False) -> str:
+    return FAST_RESAMPLE_QUALITY if fast_mode else RESAMPLE_QUALITY
+
+
+def feature_cache_tag(hop_length: int) -> str:
+    # Anything that changes cached reference features must be part of this tag.
+    return (
+        f"v1-{PITCH_BACKEND}-sr{ANALYSIS_SAMPLE_RATE}-n{ANALYSIS_N_FFT}"
+        f"-h{int(hop_length)}-rs{RESAMPLE_QUALITY}"
+    )
 
 
 def extract_pitch(
-    file_path: str,
+    file_path: AudioSource,
     hop_length: int = DEFAULT_PITCH_HOP_LENGTH,
     target_sr: Optional[int] = ANALYSIS_SAMPLE_RATE,
+    backend: str = PITCH_BACKEND,
 ) -> np.ndarray:
-    audio, sr = _load_mono_audio(file_path, target_sr=target_sr)
-
-    if USE_PYIN:
-        try:
-            f0, _, _ = librosa.pyin(
-                audio,
-                sr=sr,
-                fmin=librosa.note_to_hz("C2"),
-                fmax=librosa.note_to_hz("C6"),
-                hop_length=hop_length,
-            )
-            pitched = f0[np.isfinite(f0)]
-            if pitched.size:
-                return pitched.astype(np.float32)
-        except Exception:
-            pass
-
-    pitches, magnitudes = librosa.piptrack(y=audio, sr=sr, hop_length=hop_length)
-    if pitches.size == 0:
-        return np.array([], dtype=np.float32)
-
-    frame_indices = np.argmax(magnitudes, axis=0)
-    frame_positions = np.arange(pitches.shape[1])
-    values = pitches[frame_indices, frame_positions]
-    voiced = values[values > 0]
-    return voiced.astype(np.float32, copy=False)
+    return AnalysisSession.from_file(
+        file_path,
+        hop_length=hop_length,
+        target_sr=target_sr,
+        pitch_backend=backend,
+    ).pitch
 
 
 def calculate_pitch_accuracy(
     reference_pitch: np.ndarray,
     user_pitch: np.ndarray,
-    tolerance_hz: float = 20.0,
+    tolerance_cents: float = PITCH_TOLERANCE_CENTS,
 ) -> float:
-    if reference_pitch.size == 0 or user_pitch.size == 0:
-        return 0.0
-
-    length = min(len(reference_pitch), len(user_pitch))
-    diff = np.abs(reference_pitch[:length] - user_pitch[:length])
-    correct = np.count_nonzero(diff <= tolerance_hz)
-    return round((correct / length) * 100.0, 2)
+    # Banded DTW so a late entry or a held note does not misalign every frame.
+    return align_pitch(reference_pitch, user_pitch, tolerance_cents=tolerance_cents).accuracy
 
 
 def _safe_corrcoef(a: np.ndarray, b: np.ndarray) -> float:
@@ -159,24 +414,13 @@ def _safe_corrcoef(a: np.ndarray, b: np.ndarray) -> float:
     return corr
 
 
-def calculate_timing_accuracy(
-    reference_file: str,
-    user_file: str,
-    target_sr: int = TIMING_SAMPLE_RATE,
-) -> float:
-    ref_audio, ref_sr = _load_mono_audio(reference_file, target_sr=target_sr)
-    user_audio, user_sr = _load_mono_audio(user_file, target_sr=target_sr)
-
-    ref_onset = librosa.onset.onset_strength(y=ref_audio, sr=ref_sr)
-    user_onset = librosa.onset.onset_strength(y=user_audio, sr=user_sr)
-
-    corr = _safe_corrcoef(ref_onset, user_onset)
+def _timing_score(reference, user) -> float:
+    corr = _safe_corrcoef(reference.onset_envelope, user.onset_envelope)
     corr_score = max(0.0, min(100.0, ((corr + 1.0) / 2.0) * 100.0))
 
-    ref_tempo, _ = librosa.beat.beat_track(y=ref_audio, sr=ref_sr)
-    user_tempo, _ = librosa.beat.beat_track(y=user_audio, sr=user_sr)
+    ref_tempo = float(reference.tempo)
     if ref_tempo > 0:
-        tempo_error = abs(float(user_tempo) - float(ref_tempo)) / float(ref_tempo)
+        tempo_error = abs(float(user.tempo) - ref_tempo) / ref_tempo
         tempo_score = max(0.0, 100.0 - (tempo_error * 100.0))
     else:
         tempo_score = 0.0
@@ -255,36 +499,18 @@ def _self_pitch_consistency_score(user_pitch: np.ndarray) -> float:
     return round(max(0.0, min(100.0, score)), 2)
 
 
-def generate_stats(
-    user_file: str,
-    reference_file: Optional[str] = None,
-    fast_mode: bool = False,
-) -> dict:
-    hop_length = FAST_PITCH_HOP_LENGTH if fast_mode else DEFAULT_PITCH_HOP_LENGTH
-    user_pitch = extract_pitch(
-        user_file,
-        hop_length=hop_length,
-        target_sr=ANALYSIS_SAMPLE_RATE,
-    )
-    stability_score = calculate_stability_score(user_pitch)
+def stats_from_features(user, reference=None) -> dict:
+    # ``user`` and ``reference`` may be an AnalysisSession or ClipFeatures.
+    stability_score = calculate_stability_score(user.pitch)
 
     pitch_accuracy = 0.0
     timing_accuracy = 75.0
 
-    if reference_file and os.path.exists(reference_file):
-        ref_pitch = extract_pitch(
-            reference_file,
-            hop_length=hop_length,
-            target_sr=ANALYSIS_SAMPLE_RATE,
-        )
-        pitch_accuracy = calculate_pitch_accuracy(ref_pitch, user_pitch)
-        timing_accuracy = calculate_timing_accuracy(
-            reference_file,
-            user_file,
-            target_sr=TIMING_SAMPLE_RATE,
-        )
+    if reference is not None:
+        pitch_accuracy = calculate_pitch_accuracy(reference.pitch, user.pitch)
+        timing_accuracy = _timing_score(reference, user)
     else:
-        pitch_accuracy = _self_pitch_consistency_score(user_pitch)
+        pitch_accuracy = _self_pitch_consistency_score(user.pitch)
 
     pitch_accuracy = round(max(0.0, min(100.0, float(pitch_accuracy))), 2)
     timing_accuracy = round(max(0.0, min(100.0, float(timing_accuracy))), 2)
@@ -296,3 +522,117 @@ def generate_stats(
         "stability_score": stability_score,
         "high_notes_issue": pitch_accuracy < 80.0,
     }
+
+
+def generate_stats_timed(
+    user_file: AudioSource,
+    reference_file: Optional[AudioSource] = None,
+    fast_mode: bool = False,
+    reference_features: Optional[ClipFeatures] = None,
+) -> Tuple[dict, Dict[str, float]]:
+    """``generate_stats`` plus seconds spent per stage.
+
+    Features are forced in pipeline order so each lazy property is charged to
+    its own stage; the scores are identical to ``generate_stats``.
+    """
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    hop_length = analysis_hop_length(fast_mode)
+    resample_quality = analysis_resample_quality(fast_mode)
+    user = AnalysisSession.from_file(
+        user_file,
+        hop_length=hop_length,
+        target_sr=ANALYSIS_SAMPLE_RATE,
+        resample_quality=resample_quality,
+    )
+
+    reference = reference_features
+    if reference is None and reference_file is not None and (
+        not isinstance(reference_file, (str, os.PathLike)) or os.path.exists(reference_file)
+    ):
+        reference = AnalysisSession.from_file(
+            reference_file,
+            hop_length=hop_length,
+            target_sr=ANALYSIS_SAMPLE_RATE,
+            resample_quality=resample_quality,
+        ).features()
+    timings["decode"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    user.pitch
+    timings["pitch"] = time.perf_counter() - started
+
+    if reference is not None:
+        started = time.perf_counter()
+        user.tempo
+        timings["onset_tempo"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    stats = stats_from_features(user, reference)
+    timings["scoring"] = time.perf_counter() - started
+    return stats, timings
+
+
+def generate_stats(
+    user_file: AudioSource,
+    reference_file: Optional[AudioSource] = None,
+    fast_mode: bool = False,
+    reference_features: Optional[ClipFeatures] = None,
+) -> dict:
+    return generate_stats_timed(user_file, reference_file, fast_mode, reference_features)[0]
+
+
+def take_score(stats: dict) -> float:
+    # Equal-weight ranking used to pick the best of several takes.
+    return round(
+        (stats["pitch_accuracy"] + stats["timing_accuracy"] + stats["stability_score"]) / 3.0,
+        2,
+    )
+
+
+def generate_batch_stats(
+    user_files: List[AudioSource],
+    fast_mode: bool = False,
+    reference_features: Optional[ClipFeatures] = None,
+) -> List[dict]:
+    """Score several takes against one reference in a single call.
+
+    The reference features are shipped to the worker once for the whole
+    batch. A take that fails to decode or analyse gets an ``error`` entry
+    instead of failing the batch.
+    """
+    results = []
+    for user_file in user_files:
+        try:
+            results.append({"stats": generate_stats(user_file, None, fast_mode, reference_features)})
+        except Exception as exc:
+            results.append({"error": str(exc).strip() or "Could not process uploaded audio."})
+    return results
+
+
+def _write_silent_wav(path: Path, sample_rate: int = 16000, seconds: float = 1.0):
+    frames = max(1, int(sample_rate * seconds))
+    silence_frame = (0).to_bytes(2, byteorder="little", signed=True)
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(silence_frame * frames)
+
+
+def run_analysis_warmup(work_dir: Path):
+    # One fast-mode judge on silence: imports, numba JIT and FFT plans.
+    warmup_user = Path(work_dir) / f"warmup_user_{uuid.uuid4().hex}.wav"
+    warmup_reference = Path(work_dir) / f"warmup_reference_{uuid.uuid4().hex}.wav"
+    try:
+        _write_silent_wav(warmup_user)
+        _write_silent_wav(warmup_reference)
+        generate_stats(str(warmup_user), str(warmup_reference), fast_mode=True)
+        # Silence has no voiced frames, so compile the DTW kernel explicitly.
+        align_pitch(np.full(32, 220.0), np.full(32, 221.0))
+    finally:
+        for path in (warmup_user, warmup_reference):
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                pass
@@ -0,0 +1,90 @@
+"""Scaling of banded DTW pitch alignment with take length.
+
+Run from backend/ai_engine:
+
+    python -m benchmarks.bench_alignment --seconds 5 15 30 60 --late-entry 1.5
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+
+from alignment import DTW_BAND_RATIO, align_pitch
+from audio_analysis import (
+    ANALYSIS_SAMPLE_RATE,
+    DEFAULT_PITCH_HOP_LENGTH,
+    PITCH_TOLERANCE_CENTS,
+    AnalysisSession,
+)
+from benchmarks.synthetic import sung_melody
+
+
+def _index_accuracy(reference: np.ndarray, user: np.ndarray, tolerance_cents: float) -> float:
+    # The pre-DTW behaviour: compare frame i with frame i after truncation.
+    length = min(reference.size, user.size)
+    if length == 0:
+        return 0.0
+    cents = np.abs(1200.0 * np.log2(user[:length] / reference[:length]))
+    return round(float(np.mean(cents <= tolerance_cents)) * 100.0, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, nargs="+", default=[5.0, 15.0, 30.0, 60.0])
+    parser.add_argument("--hop-length", type=int, default=DEFAULT_PITCH_HOP_LENGTH)
+    parser.add_argument("--band-ratio", type=float, default=DTW_BAND_RATIO)
+    parser.add_argument("--late-entry", type=float, default=1.5, help="user delay in seconds")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", dest="json_path", default="")
+    args = parser.parse_args()
+
+    sr = ANALYSIS_SAMPLE_RATE
+    align_pitch(np.full(32, 220.0), np.full(32, 221.0))  # JIT compile outside timing
+
+    results = []
+    print(f"{'seconds':>8} {'frames':>7} {'time_ms':>8} {'peak_kb':>8} {'dtw_acc':>8} {'index_acc':>9}")
+    for seconds in args.seconds:
+        reference_audio, _ = sung_melody(seconds, sr, seed=1)
+        user_audio, _ = sung_melody(seconds, sr, seed=2, vibrato_hz=6.0)
+        delay = np.zeros(int(args.late_entry * sr), dtype=np.float32)
+        user_audio = np.concatenate([delay, user_audio])[: reference_audio.size]
+
+        reference = AnalysisSession(reference_audio, sr, hop_length=args.hop_length).pitch
+        user = AnalysisSession(user_audio, sr, hop_length=args.hop_length).pitch
+
+        best = float("inf")
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            alignment = align_pitch(reference, user, PITCH_TOLERANCE_CENTS, args.band_ratio)
+            best = min(best, time.perf_counter() - started)
+
+        tracemalloc.start()
+        align_pitch(reference, user, PITCH_TOLERANCE_CENTS, args.band_ratio)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        row = {
+            "seconds": seconds,
+            "frames": int(max(reference.size, user.size)),
+            "time_ms": round(best * 1000.0, 3),
+            "peak_kb": round(peak / 1024.0, 1),
+            "dtw_accuracy": alignment.accuracy,
+            "index_accuracy": _index_accuracy(reference, user, PITCH_TOLERANCE_CENTS),
+            "path_length": int(alignment.path.shape[0]),
+        }
+        results.append(row)
+        print(
+            f"{seconds:>8.1f} {row['frames']:>7} {row['time_ms']:>8.3f} {row['peak_kb']:>8.1f} "
+            f"{row['dtw_accuracy']:>8.2f} {row['index_accuracy']:>9.2f}"
+        )
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as out_file:
+            json.dump({"band_ratio": args.band_ratio, "results": results}, out_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""Stage timings and peak memory of the judge pipeline, with a regression gate.
+
+Every case decodes a 16-bit WAV of a synthetic user take (sine sweep,
+vibrato tone, noisy speech or click track) from memory and scores it
+against a reference from the same generator with a different seed. Each
+stage is timed separately: decode (with resampling), STFT, pitch, onset
+and tempo, and scoring. Peak traced memory comes from a separate
+``tracemalloc`` pass, so tracing does not distort the timings.
+
+Run from backend/ai_engine:
+
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --json before.json
+    python -m benchmarks.bench_pipeline --baseline before.json --threshold 0.4
+
+By default a run only gates peak memory, which does not depend on the
+machine: it exits non-zero when any case's ``peak_mb`` grew by more than
+``--memory-threshold`` against ``--memory-baseline`` (the committed
+``benchmarks/pipeline_baseline.json``; empty to skip). Timings are gated
+only when ``--baseline`` names an earlier ``--json`` run from the same
+machine, e.g. one taken on the main branch just before: the run fails
+when a timing's median ratio across all shared cases is above
+``1 + --threshold``. Single cases swing by well over 50% on a shared
+core, so timings are only judged in aggregate, and cases under
+``--min-ms`` are skipped as timer noise.
+
+The committed baseline was recorded on a shared single-core x86_64 VM
+with Python 3.11.7 and the piptrack pitch backend, so its timings are
+only informative elsewhere. After a change that moves memory on purpose,
+regenerate it with the default cases and repeats:
+
+    python -m benchmarks.bench_pipeline --json benchmarks/pipeline_baseline.json
+"""
+
+import argparse
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import soundfile as sf
+
+from audio_analysis import (
+    ANALYSIS_SAMPLE_RATE,
+    PITCH_BACKEND,
+    AnalysisSession,
+    analysis_hop_length,
+    analysis_resample_quality,
+    decode_audio,
+    stats_from_features,
+)
+from benchmarks.synthetic import click_track, noisy_speech, sine_sweep, vibrato_tone
+
+SIGNALS = {
+    "sweep": sine_sweep,
+    "vibrato": vibrato_tone,
+    "speech": noisy_speech,
+    "clicks": click_track,
+}
+STAGES = ("decode", "stft", "pitch", "onset_tempo", "scoring")
+DEFAULT_BASELINE = Path(__file__).with_name("pipeline_baseline.json")
+
+
+def _take(signal: str, seconds: float, sr: int, seed: int) -> np.ndarray:
+    kwargs = {"offset": 0.03} if signal == "clicks" and seed != 1 else {}
+    audio, _ = SIGNALS[signal](seconds, sr, seed=seed, **kwargs)
+    return audio
+
+
+def _wav_bytes(audio: np.ndarray, sr: int) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, sr, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+def _run_pipeline(wav: bytes, reference, fast_mode: bool) -> dict:
+    timings = {}
+    started = time.perf_counter()
+    decoded = decode_audio(wav, ANALYSIS_SAMPLE_RATE, analysis_resample_quality(fast_mode))
+    timings["decode"] = time.perf_counter() - started
+
+    session = AnalysisSession(decoded.samples, decoded.sample_rate, hop_length=analysis_hop_length(fast_mode))
+    for stage, compute in (
+        ("stft", lambda: session.spectrogram),
+        ("pitch", lambda: session.pitch),
+        ("onset_tempo", lambda: session.tempo),
+        ("scoring", lambda: stats_from_features(session, reference)),
+    ):
+        started = time.perf_counter()
+        compute()
+        timings[stage] = time.perf_counter() - started
+    return timings
+
+
+def _case(signal: str, seconds: float, sr: int, fast_mode: bool, repeats: int) -> dict:
+    wav = _wav_bytes(_take(signal, seconds, sr, seed=2), sr)
+    reference_audio = decode_audio(_wav_bytes(_take(signal, seconds, sr, seed=1), sr))
+    reference = AnalysisSession(
+        reference_audio.samples,
+        reference_audio.sample_rate,
+        hop_length=analysis_hop_length(fast_mode),
+    ).features()
+
+    _run_pipeline(wav, reference, fast_mode)  # warm caches, JIT and FFT plans
+    best = {stage: float("inf") for stage in STAGES}
+    best_total = float("inf")
+    for _ in range(repeats):
+        timings = _run_pipeline(wav, reference, fast_mode)
+        for stage in STAGES:
+            best[stage] = min(best[stage], timings[stage])
+        best_total = min(best_total, sum(timings.values()))
+
+    tracemalloc.start()
+    _run_pipeline(wav, reference, fast_mode)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    row = {
+        "case": f"{signal}/{seconds:g}s/{sr}/{'fast' if fast_mode else 'full'}",
+        "signal": signal,
+        "seconds": seconds,
+        "sample_rate": sr,
+        "mode": "fast" if fast_mode else "full",
+        "total_ms": round(best_total * 1000.0, 3),
+        "peak_mb": round(peak / (1024.0 * 1024.0), 2),
+    }
+    for stage in STAGES:
+        row[f"{stage}_ms"] = round(best[stage] * 1000.0, 3)
+    return row
+
+
+def _environment() -> dict:
+    return {
+        "pitch_backend": PITCH_BACKEND,
+        "analysis_sample_rate": ANALYSIS_SAMPLE_RATE,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+    }
+
+
+def _regressions(
+    results,
+    baseline_path: str,
+    memory_threshold: float,
+    threshold: Optional[float] = None,
+    min_ms: float = 0.0,
+):
+    with open(baseline_path, "r", encoding="utf-8") as baseline_file:
+        stored = json.load(baseline_file)
+    for key, value in _environment().items():
+        if stored.get(key) != value:
+            print(f"note: baseline {key} is {stored.get(key)!r}, this run is {value!r}")
+    baseline = {row["case"]: row for row in stored["results"]}
+
+    found = []
+    ratios = {}
+    for row in results:
+        before = baseline.get(row["case"])
+        if before is None:
+            continue
+        for metric in ["total_ms", "peak_mb"] + [f"{stage}_ms" for stage in STAGES]:
+            old = before.get(metric)
+            if not old or (metric.endswith("_ms") and old < min_ms):
+                continue
+            ratio = row[metric] / old
+            if metric == "peak_mb":
+                if ratio > 1.0 + memory_threshold:
+                    found.append((row["case"], metric, ratio))
+            elif threshold is not None:
+                ratios.setdefault(metric, []).append(ratio)
+
+    for metric, values in ratios.items():
+        median = float(np.median(values))
+        print(f"{metric:>15}: median {median:.2f}x over {len(values)} cases")
+        if median > 1.0 + threshold:
+            found.append((f"median of {len(values)} cases", metric, median))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--signals", nargs="+", choices=sorted(SIGNALS), default=list(SIGNALS))
+    parser.add_argument("--seconds", type=float, nargs="+", default=[5.0, 15.0, 30.0, 60.0])
+    parser.add_argument("--rates", type=int, nargs="+", default=[16000, 44100, 48000])
+    parser.add_argument("--modes", nargs="+", choices=["fast", "full"], default=["fast", "full"])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", dest="json_path", default="")
+    parser.add_argument(
+        "--baseline",
+        default="",
+        help="earlier --json output from this machine to gate timings and memory against",
+    )
+    parser.add_argument(
+        "--memory-baseline",
+        default=str(DEFAULT_BASELINE),
+        help="--json output to gate peak memory against when --baseline is not given; empty to skip",
+    )
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed median slowdown, 0.25 = 25%%")
+    parser.add_argument("--memory-threshold", type=float, default=0.1, help="allowed peak memory growth")
+    parser.add_argument("--min-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    results = []
+    header = f"{'case':>26} {'total':>9} " + " ".join(f"{stage:>11}" for stage in STAGES) + f" {'peak_mb':>8}"
+    print(header)
+    for mode in args.modes:
+        for signal in args.signals:
+            for rate in args.rates:
+                for seconds in args.seconds:
+                    row = _case(signal, seconds, rate, mode == "fast", args.repeats)
+                    results.append(row)
+                    print(
+                        f"{row['case']:>26} {row['total_ms']:>9.1f} "
+                        + " ".join(f"{row[f'{stage}_ms']:>11.2f}" for stage in STAGES)
+                        + f" {row['peak_mb']:>8.1f}"
+                    )
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as out_file:
+            json.dump({**_environment(), "repeats": args.repeats, "results": results}, out_file, indent=2)
+            out_file.write("\n")
+
+    baseline = args.baseline or args.memory_baseline
+    refreshed = bool(args.json_path) and Path(args.json_path).resolve() == Path(baseline).resolve()
+    if baseline and not refreshed:
+        threshold = args.threshold if args.baseline else None
+        regressions = _regressions(results, baseline, args.memory_threshold, threshold, args.min_ms)
+        for label, metric, ratio in regressions:
+            print(f"REGRESSION {label} {metric}: {ratio:.2f}x the baseline")
+        if regressions:
+            sys.exit(1)
+        gated = f"{args.threshold:.0%}, memory " if args.baseline else "memory "
+        print(f"No regressions beyond {gated}{args.memory_threshold:.0%} against {baseline}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Speed and accuracy of the extract_pitch backends on synthetic singing.
+
+Run from backend/ai_engine:
+
+    python -m benchmarks.bench_pitch --seconds 5 15 30 --json pitch.json
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from audio_analysis import ANALYSIS_SAMPLE_RATE, DEFAULT_PITCH_HOP_LENGTH, AnalysisSession
+from benchmarks.synthetic import frame_truth, sung_melody
+
+
+def _score(contour: np.ndarray, truth: np.ndarray, tolerance_cents: float) -> dict:
+    length = min(contour.size, truth.size)
+    contour = contour[:length]
+    truth = truth[:length]
+    truth_voiced = np.isfinite(truth)
+    est_voiced = contour > 0
+
+    both = truth_voiced & est_voiced
+    cents = np.abs(1200.0 * np.log2(contour[both] / truth[both]))
+    return {
+        "raw_pitch_accuracy": round(float(np.mean(cents <= tolerance_cents)) if cents.size else 0.0, 4),
+        "voicing_recall": round(float(np.mean(est_voiced[truth_voiced])) if truth_voiced.any() else 0.0, 4),
+        "false_voicing": round(float(np.mean(est_voiced[~truth_voiced])) if (~truth_voiced).any() else 0.0, 4),
+    }
+
+
+def _time_backend(audio, sr, hop_length, backend, repeats):
+    best = float("inf")
+    contour = None
+    for _ in range(repeats):
+        session = AnalysisSession(audio, sr, hop_length=hop_length, pitch_backend=backend)
+        started = time.perf_counter()
+        contour = session.pitch_contour
+        best = min(best, time.perf_counter() - started)
+    return best, contour
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, nargs="+", default=[5.0, 15.0, 30.0])
+    parser.add_argument("--backends", nargs="+", default=["piptrack", "yin", "pyin"])
+    parser.add_argument("--hop-length", type=int, default=DEFAULT_PITCH_HOP_LENGTH)
+    parser.add_argument("--sr", type=int, default=ANALYSIS_SAMPLE_RATE)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--tolerance-cents", type=float, default=50.0)
+    parser.add_argument("--json", dest="json_path", default="")
+    args = parser.parse_args()
+
+    # Pay JIT/FFT plan setup outside the timed runs.
+    warm_audio, _ = sung_melody(1.0, args.sr)
+    for backend in args.backends:
+        _time_backend(warm_audio, args.sr, args.hop_length, backend, 1)
+
+    results = []
+    print(f"{'seconds':>8} {'backend':>9} {'time_s':>8} {'x_rt':>8} {'rpa':>6} {'v_rec':>6} {'v_fa':>6}")
+    for seconds in args.seconds:
+        audio, f0 = sung_melody(seconds, args.sr)
+        for backend in args.backends:
+            # pyin is slow enough that one run is representative.
+            repeats = 1 if backend == "pyin" else args.repeats
+            elapsed, contour = _time_backend(audio, args.sr, args.hop_length, backend, repeats)
+            truth = frame_truth(f0, args.hop_length, contour.size)
+            row = {
+                "seconds": seconds,
+                "backend": backend,
+                "time_s": round(elapsed, 5),
+                "realtime_factor": round(seconds / elapsed, 1) if elapsed > 0 else None,
+                **_score(contour, truth, args.tolerance_cents),
+            }
+            results.append(row)
+            print(
+                f"{seconds:>8.1f} {backend:>9} {row['time_s']:>8.4f} {row['realtime_factor']:>8} "
+                f"{row['raw_pitch_accuracy']:>6.3f} {row['voicing_recall']:>6.3f} {row['false_voicing']:>6.3f}"
+            )
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as out_file:
+            json.dump({"hop_length": args.hop_length, "sr": args.sr, "results": results}, out_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
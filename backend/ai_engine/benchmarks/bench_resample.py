@@ -0,0 +1,108 @@
+"""Cost and fidelity of browser-rate to analysis-rate resampling.
+
+Compares the previous ``librosa.resample`` path, each tier of the resampling
+layer, and scipy's polyphase filter with a cached FIR. Fidelity is SNR against
+the ``very_high`` tier and the drift of the judge's pitch and stability scores.
+
+Run from backend/ai_engine:
+
+    python -m benchmarks.bench_resample --seconds 5 60 --rates 44100 48000
+"""
+
+import argparse
+import json
+import math
+import time
+from functools import lru_cache
+
+import librosa
+import numpy as np
+from scipy.signal import firwin, resample_poly
+
+from audio_analysis import ANALYSIS_SAMPLE_RATE, AnalysisSession, stats_from_features
+from benchmarks.synthetic import sung_melody
+from resampling import RESAMPLE_QUALITIES, resample
+
+
+@lru_cache(maxsize=None)
+def _polyphase_filter(up: int, down: int) -> np.ndarray:
+    # scipy's default design (Kaiser, beta 5, 10 zero crossings), built once.
+    max_rate = max(up, down)
+    return firwin(20 * max_rate + 1, 1.0 / max_rate, window=("kaiser", 5.0)).astype(np.float32)
+
+
+def _scipy_polyphase(audio, orig_sr, target_sr):
+    divisor = math.gcd(orig_sr, target_sr)
+    up, down = target_sr // divisor, orig_sr // divisor
+    return resample_poly(audio, up, down, window=_polyphase_filter(up, down)).astype(np.float32)
+
+
+def _methods():
+    methods = {
+        "librosa_soxr_hq": lambda audio, sr, target: librosa.resample(
+            audio, orig_sr=sr, target_sr=target
+        ),
+        "scipy_polyphase": _scipy_polyphase,
+    }
+    for tier in RESAMPLE_QUALITIES:
+        methods[tier] = lambda audio, sr, target, tier=tier: resample(audio, sr, target, tier)
+    return methods
+
+
+def _snr_db(estimate: np.ndarray, reference: np.ndarray) -> float:
+    length = min(estimate.size, reference.size)
+    edge = min(1000, length // 10)
+    reference = reference[edge : length - edge]
+    error = estimate[edge : length - edge] - reference
+    return round(10.0 * math.log10(np.sum(reference**2) / max(np.sum(error**2), 1e-20)), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, nargs="+", default=[5.0, 60.0])
+    parser.add_argument("--rates", type=int, nargs="+", default=[44100, 48000])
+    parser.add_argument("--target-sr", type=int, default=ANALYSIS_SAMPLE_RATE)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", dest="json_path", default="")
+    args = parser.parse_args()
+
+    methods = _methods()
+    results = []
+    print(f"{'seconds':>8} {'rate':>6} {'method':>16} {'time_ms':>8} {'snr_db':>7} {'d_pitch':>8} {'d_stab':>7}")
+    for rate in args.rates:
+        for seconds in args.seconds:
+            audio, _ = sung_melody(seconds, rate, seed=3)
+            truth = resample(audio, rate, args.target_sr, "very_high")
+            truth_stats = stats_from_features(AnalysisSession(truth, args.target_sr))
+
+            for name, method in methods.items():
+                method(audio[: rate // 4], rate, args.target_sr)  # filter design / warmup
+                best = float("inf")
+                for _ in range(args.repeats):
+                    started = time.perf_counter()
+                    out = method(audio, rate, args.target_sr)
+                    best = min(best, time.perf_counter() - started)
+
+                stats = stats_from_features(AnalysisSession(out, args.target_sr))
+                row = {
+                    "seconds": seconds,
+                    "rate": rate,
+                    "method": name,
+                    "time_ms": round(best * 1000.0, 3),
+                    "snr_db": _snr_db(out, truth),
+                    "pitch_delta": round(stats["pitch_accuracy"] - truth_stats["pitch_accuracy"], 2),
+                    "stability_delta": round(stats["stability_score"] - truth_stats["stability_score"], 2),
+                }
+                results.append(row)
+                print(
+                    f"{seconds:>8.1f} {rate:>6} {name:>16} {row['time_ms']:>8.2f} {row['snr_db']:>7.1f} "
+                    f"{row['pitch_delta']:>8.2f} {row['stability_delta']:>7.2f}"
+                )
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as out_file:
+            json.dump({"target_sr": args.target_sr, "results": results}, out_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
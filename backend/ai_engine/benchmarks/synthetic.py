@@ -0,0 +1,139 @@
+from typing import Tuple
+
+import numpy as np
+
+
+def sung_melody(
+    seconds: float,
+    sr: int,
+    base_hz: float = 220.0,
+    vibrato_hz: float = 5.5,
+    vibrato_depth: float = 0.012,
+    noise: float = 0.01,
+    rest_every: float = 4.0,
+    seed: int = 0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Harmonic vibrato voice stepping through a scale, with short rests.
+
+    Returns ``(audio, f0)`` where ``f0`` is the per-sample ground truth in Hz
+    and ``NaN`` during rests.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sr)) / float(sr)
+    steps = np.array([0, 2, 4, 5, 7, 9, 7, 4], dtype=np.float64)
+    notes = steps[(np.floor(t * 2.0).astype(int)) % steps.size]
+    f0 = base_hz * 2.0 ** (notes / 12.0)
+    f0 *= 1.0 + vibrato_depth * np.sin(2.0 * np.pi * vibrato_hz * t)
+
+    phase = 2.0 * np.pi * np.cumsum(f0) / float(sr)
+    audio = 0.45 * np.sin(phase) + 0.2 * np.sin(2 * phase) + 0.08 * np.sin(3 * phase)
+
+    if rest_every > 0:
+        resting = (t % rest_every) >= (rest_every - 0.5)
+        audio[resting] = 0.0
+        f0 = f0.copy()
+        f0[resting] = np.nan
+
+    audio += noise * rng.standard_normal(t.size)
+    return audio.astype(np.float32), f0.astype(np.float32)
+
+
+def frame_truth(f0: np.ndarray, hop_length: int, n_frames: int) -> np.ndarray:
+    # Ground truth at the centre of each (librosa-centred) analysis frame.
+    index = np.minimum(np.arange(n_frames) * hop_length, f0.size - 1)
+    return f0[index]
+
+
+def sine_sweep(
+    seconds: float,
+    sr: int,
+    start_hz: float = 110.0,
+    stop_hz: float = 880.0,
+    noise: float = 0.005,
+    seed: int = 0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    # Exponential sweep: covers the whole singing range once per clip.
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sr)) / float(sr)
+    f0 = start_hz * (stop_hz / start_hz) ** (t / max(seconds, 1e-9))
+    phase = 2.0 * np.pi * np.cumsum(f0) / float(sr)
+    audio = 0.5 * np.sin(phase) + noise * rng.standard_normal(t.size)
+    return audio.astype(np.float32), f0.astype(np.float32)
+
+
+def vibrato_tone(
+    seconds: float,
+    sr: int,
+    base_hz: float = 330.0,
+    vibrato_hz: float = 5.5,
+    vibrato_depth: float = 0.03,
+    noise: float = 0.01,
+    seed: int = 0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    # One held note with wide vibrato: the stability metric's hard case.
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sr)) / float(sr)
+    f0 = base_hz * (1.0 + vibrato_depth * np.sin(2.0 * np.pi * vibrato_hz * t))
+    phase = 2.0 * np.pi * np.cumsum(f0) / float(sr)
+    audio = 0.45 * np.sin(phase) + 0.15 * np.sin(2 * phase) + noise * rng.standard_normal(t.size)
+    return audio.astype(np.float32), f0.astype(np.float32)
+
+
+def noisy_speech(
+    seconds: float,
+    sr: int,
+    syllable_hz: float = 4.0,
+    noise: float = 0.05,
+    seed: int = 0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Speech-like input: gliding pulse-train "vowels" between noise bursts.
+
+    Each syllable is voiced for its first two thirds with an f0 that drifts
+    around 100-200 Hz, then unvoiced (fricative-like noise). A noise floor
+    runs throughout. ``f0`` is ``NaN`` where the signal is unvoiced.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sr)
+    t = np.arange(n) / float(sr)
+    position = (t * syllable_hz) % 1.0
+    voiced = position < (2.0 / 3.0)
+
+    syllables = int(np.ceil(seconds * syllable_hz)) + 1
+    centres = rng.uniform(100.0, 200.0, syllables)
+    index = np.minimum((t * syllable_hz).astype(int), syllables - 1)
+    f0 = centres[index] * (1.0 + 0.08 * (position - 0.33))
+
+    # Band-limited pulse train (first 12 harmonics) shaped by a syllable envelope.
+    phase = 2.0 * np.pi * np.cumsum(f0) / float(sr)
+    harmonics = np.arange(1, 13)[:, None]
+    pulses = np.sum(np.sin(harmonics * phase[None, :]) / harmonics, axis=0)
+    envelope = np.sin(np.pi * np.clip(position / (2.0 / 3.0), 0.0, 1.0))
+    audio = 0.12 * pulses * envelope * voiced
+    audio += 0.15 * rng.standard_normal(n) * (~voiced)
+    audio += noise * rng.standard_normal(n)
+
+    f0 = f0.astype(np.float32)
+    f0[~voiced] = np.nan
+    return audio.astype(np.float32), f0
+
+
+def click_track(
+    seconds: float,
+    sr: int,
+    bpm: float = 120.0,
+    offset: float = 0.0,
+    noise: float = 0.002,
+    seed: int = 0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    # Decaying noise clicks on every beat; ``offset`` shifts them for timing tests.
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sr)
+    audio = noise * rng.standard_normal(n)
+    click = int(0.02 * sr)
+    shape = rng.standard_normal(click) * np.exp(-np.arange(click) / (0.004 * sr))
+    shape /= np.max(np.abs(shape))
+    for start in np.arange(offset, seconds, 60.0 / bpm):
+        begin = int(start * sr)
+        end = min(n, begin + click)
+        audio[begin:end] += 0.8 * shape[: end - begin]
+    return audio.astype(np.float32), np.full(n, np.nan, dtype=np.float32)
@@ -0,0 +1,228 @@
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from logging_setup import get_logger
+
+CACHE_MAX_BYTES = max(0, int(os.getenv("AI_CACHE_MAX_BYTES", str(512 * 1024 * 1024))))
+CACHE_JANITOR_INTERVAL_SECONDS = max(5.0, float(os.getenv("AI_CACHE_JANITOR_INTERVAL_SECONDS", "300")))
+CACHE_STALE_SECONDS = max(60.0, float(os.getenv("AI_CACHE_STALE_SECONDS", "900")))
+# Entries touched this recently are never evicted: they may be mid-analysis.
+CACHE_MIN_IDLE_SECONDS = 60.0
+ACCESS_INDEX_NAME = "access_index.json"
+
+_KEY_PATTERN = re.compile(r"^([0-9a-f]{64})\.")
+
+logger = get_logger("cache")
+
+
+def _cache_key_of(name: str) -> Optional[str]:
+    match = _KEY_PATTERN.match(name)
+    return match.group(1) if match else None
+
+
+class CacheManager:
+    """Byte budget for the reference cache plus a janitor for leaked files.
+
+    Every file under ``root`` whose name starts with a cache key (blob,
+    ``.meta`` sidecar, feature ``.npz`` files) is evicted together, least
+    recently used key first. Last-access times live in a small JSON index,
+    falling back to file mtimes for keys never seen by this process. Stale
+    ``.part`` files and ``tmp_dir`` leftovers are swept on the same cycle.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        tmp_dir: Path,
+        max_bytes: int = CACHE_MAX_BYTES,
+        stale_seconds: float = CACHE_STALE_SECONDS,
+        interval: float = CACHE_JANITOR_INTERVAL_SECONDS,
+    ):
+        self.root = Path(root)
+        self.tmp_dir = Path(tmp_dir)
+        self.max_bytes = int(max_bytes)
+        self.stale_seconds = float(stale_seconds)
+        self.interval = float(interval)
+        self._index_path = self.root / ACCESS_INDEX_NAME
+        self._access: Dict[str, float] = self._load_index()
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.swept_files = 0
+        self.last_size_bytes = 0
+        self.last_run_at = 0.0
+
+    def _load_index(self) -> Dict[str, float]:
+        try:
+            with self._index_path.open("r", encoding="utf-8") as index_file:
+                data = json.load(index_file)
+            return {str(key): float(value) for key, value in data.items()}
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def _save_index(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = dict(self._access)
+            self._dirty = False
+        partial = self._index_path.with_name(f"{ACCESS_INDEX_NAME}.{uuid.uuid4().hex}.part")
+        try:
+            partial.write_text(json.dumps(snapshot), encoding="utf-8")
+            os.replace(partial, self._index_path)
+        except OSError as exc:
+            logger.warning("Cache index not saved: %s", exc)
+        finally:
+            try:
+                partial.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    def touch(self, key: str):
+        with self._lock:
+            self._access[key] = time.time()
+            self._dirty = True
+
+    def record(self, key: str, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self.touch(key)
+
+    @staticmethod
+    def _files_under(root: Path) -> List[Tuple[Path, os.stat_result]]:
+        files = []
+        for directory, _, names in os.walk(root):
+            for name in names:
+                path = Path(directory) / name
+                try:
+                    files.append((path, path.stat()))
+                except OSError:
+                    continue
+        return files
+
+    def _files(self) -> List[Tuple[Path, os.stat_result]]:
+        return self._files_under(self.root)
+
+    def _remove(self, path: Path) -> bool:
+        try:
+            path.unlink()
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError as exc:
+            logger.warning("Cache cleanup skipped %s: %s", path.name, exc)
+            return False
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        # Leftovers from dead requests: uploads in tmp_dir and abandoned .part files.
+        now = time.time() if now is None else now
+        removed = 0
+        candidates = self._files_under(self.tmp_dir)
+        candidates += [(path, stat) for path, stat in self._files() if path.name.endswith(".part")]
+        for path, stat in candidates:
+            if now - stat.st_mtime > self.stale_seconds and self._remove(path):
+                removed += 1
+        self.swept_files += removed
+        return removed
+
+    def enforce_budget(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        groups: Dict[str, List[Tuple[Path, int]]] = {}
+        last_used: Dict[str, float] = {}
+        total = 0
+        for path, stat in self._files():
+            total += stat.st_size
+            key = _cache_key_of(path.name)
+            if key is None or path.name.endswith(".part"):
+                continue
+            groups.setdefault(key, []).append((path, stat.st_size))
+            last_used[key] = max(last_used.get(key, 0.0), stat.st_mtime)
+
+        with self._lock:
+            for key in groups:
+                last_used[key] = self._access.get(key, last_used[key])
+            # Forget keys whose files are gone.
+            for key in [key for key in self._access if key not in groups]:
+                del self._access[key]
+                self._dirty = True
+
+        self.last_size_bytes = total
+        if self.max_bytes <= 0 or total <= self.max_bytes:
+            return 0
+
+        evicted = 0
+        for key in sorted(groups, key=last_used.__getitem__):
+            if total <= self.max_bytes:
+                break
+            if now - last_used[key] < CACHE_MIN_IDLE_SECONDS:
+                break
+            for path, size in groups[key]:
+                if self._remove(path):
+                    total -= size
+                    self.evicted_bytes += size
+            with self._lock:
+                self._access.pop(key, None)
+                self._dirty = True
+            evicted += 1
+
+        self.evictions += evicted
+        self.last_size_bytes = total
+        return evicted
+
+    def run_once(self):
+        now = time.time()
+        self.sweep(now)
+        self.enforce_budget(now)
+        self._save_index()
+        self.last_run_at = now
+
+    async def _janitor(self):
+        while True:
+            try:
+                await run_in_threadpool(self.run_once)
+            except Exception as exc:
+                logger.exception("Cache janitor failed: %s", exc)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._janitor())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await run_in_threadpool(self._save_index)
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size_bytes": self.last_size_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+            "swept_files": self.swept_files,
+            "last_run_at": self.last_run_at,
+        }
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from logging_setup import get_logger
+
+FEEDBACK_CACHE_ITEMS = max(0, int(os.getenv("AI_FEEDBACK_CACHE_ITEMS", "1024")))
+FEEDBACK_CACHE_TTL_SECONDS = max(0.0, float(os.getenv("AI_FEEDBACK_CACHE_TTL_SECONDS", str(7 * 24 * 3600))))
+# Scores are bucketed to this many percentage points before keying.
+FEEDBACK_CACHE_BUCKET = max(0.1, float(os.getenv("AI_FEEDBACK_CACHE_BUCKET", "5")))
+FEEDBACK_CACHE_VARIANTS = max(1, int(os.getenv("AI_FEEDBACK_CACHE_VARIANTS", "3")))
+# Empty keeps the cache in memory only.
+FEEDBACK_CACHE_PATH = os.getenv("AI_FEEDBACK_CACHE_PATH", "").strip()
+
+_SCORE_FIELDS = ("pitch_accuracy", "timing_accuracy", "stability_score")
+
+logger = get_logger("feedback_cache")
+
+
+def _bucket(value, size: float) -> float:
+    try:
+        value = max(0.0, min(100.0, float(value)))
+    except (TypeError, ValueError):
+        value = 0.0
+    return round(round(value / size) * size, 3)
+
+
+def feedback_cache_key(
+    stats: Dict[str, float],
+    song_title: str,
+    artist: str,
+    judge_style: str,
+    model: str = "",
+    bucket: float = FEEDBACK_CACHE_BUCKET,
+) -> str:
+    payload = {
+        "scores": [_bucket(stats.get(field, 0), bucket) for field in _SCORE_FIELDS],
+        "high_notes_issue": bool(stats.get("high_notes_issue", False)),
+        "title": (song_title or "").strip().lower(),
+        "artist": (artist or "").strip().lower(),
+        "style": (judge_style or "").strip().lower(),
+        "model": model,
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def feedback_seed(key: str) -> int:
+    return int(key[:12], 16)
+
+
+class FeedbackCache:
+    """LRU of generated feedback texts with a TTL per variant.
+
+    Each key holds up to ``max_variants`` generated texts. A key counts as a
+    hit only once all its variant slots are filled; until then callers
+    generate a fresh text and ``put`` it, so repeat singers still hear
+    varied feedback. With ``path`` set, entries survive restarts through an
+    atomically replaced JSON file written by ``save``.
+    """
+
+    def __init__(
+        self,
+        max_items: int = FEEDBACK_CACHE_ITEMS,
+        ttl: float = FEEDBACK_CACHE_TTL_SECONDS,
+        max_variants: int = FEEDBACK_CACHE_VARIANTS,
+        path: str = FEEDBACK_CACHE_PATH,
+    ):
+        self.max_items = max(0, int(max_items))
+        self.ttl = float(ttl)
+        self.max_variants = max(1, int(max_variants))
+        self.path = Path(path) if path else None
+        self._entries: "OrderedDict[str, List[Tuple[float, str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.path is not None:
+            self._load()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_items > 0
+
+    def _fresh(self, variants: List[Tuple[float, str]], now: float) -> List[Tuple[float, str]]:
+        if self.ttl <= 0:
+            return variants
+        return [(created, text) for created, text in variants if now - created < self.ttl]
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            variants = self._entries.get(key)
+            if variants is not None:
+                fresh = self._fresh(variants, now)
+                if len(fresh) != len(variants):
+                    self._dirty = True
+                    if fresh:
+                        self._entries[key] = fresh
+                    else:
+                        del self._entries[key]
+                variants = fresh
+            if variants and len(variants) >= self.max_variants:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return random.choice(variants)[1]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, text: str):
+        text = (text or "").strip()
+        if not self.enabled or not text:
+            return
+        with self._lock:
+            # Repeats are kept too: a model that always answers alike still fills its slots.
+            variants = self._fresh(self._entries.get(key, []), time.time())
+            variants.append((time.time(), text))
+            self._entries[key] = variants[-self.max_variants:]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._dirty = True
+
+    def _load(self):
+        try:
+            with self.path.open("r", encoding="utf-8") as cache_file:
+                data = json.load(cache_file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            logger.warning("Feedback cache not loaded: %s", exc)
+            return
+        now = time.time()
+        for key, variants in data.items():
+            try:
+                fresh = self._fresh([(float(created), str(text)) for created, text in variants], now)
+            except (TypeError, ValueError):
+                continue
+            if fresh:
+                self._entries[key] = fresh[-self.max_variants:]
+        while len(self._entries) > self.max_items:
+            self._entries.popitem(last=False)
+
+    def save(self):
+        if self.path is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = {key: list(variants) for key, variants in self._entries.items()}
+            self._dirty = False
+        partial = self.path.with_name(f"{self.path.name}.{uuid.uuid4().hex}.part")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            partial.write_text(json.dumps(snapshot), encoding="utf-8")
+            os.replace(partial, self.path)
+        except OSError as exc:
+            logger.warning("Feedback cache not saved: %s", exc)
+        finally:
+            try:
+                partial.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "items": len(self._entries),
+            "max_items": self.max_items,
+            "max_variants": self.max_variants,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "persistent": self.path is not None,
+        }
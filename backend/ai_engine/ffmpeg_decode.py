@@ -0,0 +1,115 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from functools import lru_cache
+from typing import Optional
+
+FFMPEG_BINARY = os.getenv("AI_FFMPEG_BINARY", "ffmpeg").strip() or "ffmpeg"
+FFMPEG_MAX_PROCESSES = max(1, int(os.getenv("AI_FFMPEG_MAX_PROCESSES", "2")))
+FFMPEG_TIMEOUT_SECONDS = max(1.0, float(os.getenv("AI_FFMPEG_TIMEOUT_SECONDS", "30")))
+FFMPEG_READ_CHUNK_BYTES = 64 * 1024
+
+_decoder_slots = threading.BoundedSemaphore(FFMPEG_MAX_PROCESSES)
+
+
+class FFmpegDecodeError(RuntimeError):
+    pass
+
+
+@lru_cache(maxsize=1)
+def ffmpeg_available() -> bool:
+    return shutil.which(FFMPEG_BINARY) is not None
+
+
+def _command(input_path: str, sample_rate: int):
+    return [
+        FFMPEG_BINARY,
+        "-nostdin",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-threads",
+        "1",
+        "-i",
+        input_path,
+        "-map",
+        "0:a:0",
+        "-ac",
+        "1",
+        "-ar",
+        str(int(sample_rate)),
+        "-f",
+        "s16le",
+        "pipe:1",
+    ]
+
+
+def _read_pcm(stdout, max_samples: Optional[int]) -> bytearray:
+    # Read straight into one buffer; sized up front when the limit is known.
+    limit = None if max_samples is None else (max_samples + 1) * 2
+    buffer = bytearray(limit or FFMPEG_READ_CHUNK_BYTES * 16)
+    size = 0
+    while limit is None or size < limit:
+        if size == len(buffer):
+            buffer.extend(bytes(len(buffer)))
+        read = stdout.readinto(memoryview(buffer)[size : size + FFMPEG_READ_CHUNK_BYTES])
+        if not read:
+            break
+        size += read
+    del buffer[size - (size % 2) :]
+    return buffer
+
+
+def _decode_path(input_path: str, sample_rate: int, max_samples: Optional[int]) -> bytearray:
+    process = subprocess.Popen(
+        _command(input_path, sample_rate),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    watchdog = threading.Timer(FFMPEG_TIMEOUT_SECONDS, process.kill)
+    watchdog.start()
+    try:
+        pcm = _read_pcm(process.stdout, max_samples)
+        if max_samples is not None and len(pcm) > max_samples * 2:
+            # Over the limit: stop decoding instead of draining the rest.
+            process.kill()
+            process.wait()
+            return pcm
+        stderr = process.stderr.read()
+        returncode = process.wait()
+    finally:
+        watchdog.cancel()
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+    if returncode != 0:
+        message = stderr.decode("utf-8", "replace").strip().splitlines()
+        detail = message[-1] if message else f"exit code {returncode}"
+        raise FFmpegDecodeError(f"ffmpeg could not decode audio: {detail}")
+    return pcm
+
+
+def ffmpeg_decode(
+    source,
+    sample_rate: int,
+    max_samples: Optional[int] = None,
+) -> bytearray:
+    """Decode any ffmpeg-readable input to mono s16le PCM at ``sample_rate``.
+
+    ffmpeg is stopped as soon as ``max_samples + 1`` samples have been read, so
+    an oversized file is never decoded to the end. At most ``FFMPEG_MAX_PROCESSES`` decoders run at once.
+    """
+    with _decoder_slots:
+        if not isinstance(source, (bytes, bytearray, memoryview)):
+            return _decode_path(os.fspath(source), sample_rate, max_samples)
+        # MP4/M4A keep their index at the end, so ffmpeg needs a seekable input.
+        with tempfile.NamedTemporaryFile(suffix=".audio") as spill:
+            spill.write(source)
+            spill.flush()
+            return _decode_path(spill.name, sample_rate, max_samples)
@@ -1,11 +1,22 @@
+import asyncio
 import os
 import random
-from typing import Dict, List, Tuple
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
-from groq import Groq
+import httpx
+from groq import AsyncGroq
+
+from logging_setup import get_logger
 
 DEFAULT_MODEL = os.getenv("GROQ_MODEL", "llama3-8b-8192")
 API_TIMEOUT_SECONDS = float(os.getenv("GROQ_TIMEOUT_SECONDS", "8"))
+# Empty means the SDK default; point it at a local stub to test without Groq.
+API_BASE_URL = os.getenv("GROQ_BASE_URL", "").strip()
+# Callers fall back to local feedback quickly, so SDK retries only add latency.
+API_MAX_RETRIES = max(0, int(os.getenv("GROQ_MAX_RETRIES", "0")))
+API_MAX_CONNECTIONS = max(1, int(os.getenv("GROQ_MAX_CONNECTIONS", "8")))
+
+logger = get_logger("llm")
 
 STYLE_INSTRUCTIONS = {
     "strict": "Be direct and demanding, but still constructive.",
@@ -129,15 +140,15 @@ def _band(score: float) -> str:
     return "high"
 
 
-def _pick(items: List[str]) -> str:
+def _pick(items: List[str], rng=random) -> str:
     if not items:
         return ""
-    return random.choice(items)
+    return rng.choice(items)
 
 
-def _tip_for(metric: str, score: float) -> str:
+def _tip_for(metric: str, score: float, rng=random) -> str:
     metric_tips = _TIPS.get(metric, {})
-    return _pick(metric_tips.get(_band(score), []))
+    return _pick(metric_tips.get(_band(score), []), rng)
 
 
 def _build_metric_rank(stats: Dict[str, float]) -> List[Tuple[str, float]]:
@@ -150,12 +161,47 @@ def _build_metric_rank(stats: Dict[str, float]) -> List[Tuple[str, float]]:
     return ranked
 
 
-def local_feedback(
+_HIGH_NOTE_NOTE = "High notes still look tense; keep volume moderate and lift soft palate instead of pushing."
+_SCORE_LINE_FRAGMENTS = ("Scores this take: pitch", "timing", "stability")
+
+
+def _score_fragments(value: float) -> List[str]:
+    # "85.5" reads as "85", "point", "5", "percent", all from pre-rendered clips.
+    whole, tenth = f"{value:.1f}".split(".")
+    fragments = [whole]
+    if tenth != "0":
+        fragments += ["point", tenth]
+    return fragments + ["percent"]
+
+
+def template_fragments() -> List[str]:
+    """Every fixed fragment ``local_feedback_script`` can speak, for pre-rendering."""
+    fragments = []
+    for phrases in list(_OPENERS.values()) + list(_CLOSERS.values()) + list(_PRAISE_BY_METRIC.values()):
+        fragments.extend(phrases)
+    for bands in _TIPS.values():
+        for phrases in bands.values():
+            fragments.extend(phrases)
+    for label in _METRIC_LABELS.values():
+        fragments += [f"Priority focus: {label}.", f"Secondary focus: {label}."]
+    fragments += list(_SCORE_LINE_FRAGMENTS) + [_HIGH_NOTE_NOTE, "point", "percent"]
+    fragments += [str(number) for number in range(101)]
+    return list(dict.fromkeys(fragments))
+
+
+def local_feedback_script(
     stats: Dict[str, float],
     song_title: str = "the song",
     artist: str = "the artist",
     judge_style: str = "encouraging",
-) -> str:
+    seed: Optional[int] = None,
+) -> Tuple[str, List[str]]:
+    """Template feedback text plus the fragments to speak it, in order.
+
+    All fragments but the song line come from ``template_fragments``.
+    """
+    # A seed makes the phrasing reproducible, e.g. for cached fallbacks.
+    rng = random if seed is None else random.Random(seed)
     style = judge_style.lower().strip() or "encouraging"
     if style not in STYLE_INSTRUCTIONS:
         style = "encouraging"
@@ -169,51 +215,64 @@ def local_feedback(
     second_metric, second_score = ranked[1]
     strongest_metric, strongest_score = ranked[-1]
 
-    opener = _pick(_OPENERS.get(style, _OPENERS["encouraging"]))
-    praise = _pick(_PRAISE_BY_METRIC.get(strongest_metric, []))
-    primary_tip = _tip_for(weakest_metric, weakest_score)
+    opener = _pick(_OPENERS.get(style, _OPENERS["encouraging"]), rng)
+    praise = _pick(_PRAISE_BY_METRIC.get(strongest_metric, []), rng)
+    primary_tip = _tip_for(weakest_metric, weakest_score, rng)
     secondary_tip = (
-        _tip_for(second_metric, second_score)
+        _tip_for(second_metric, second_score, rng)
         if second_score < 82.0 and second_metric != weakest_metric
         else ""
     )
-    closer = _pick(_CLOSERS.get(style, _CLOSERS["encouraging"]))
+    closer = _pick(_CLOSERS.get(style, _CLOSERS["encouraging"]), rng)
 
     high_note_note = ""
     if bool(stats.get("high_notes_issue", False)) and pitch < 80.0:
-        high_note_note = " High notes still look tense; keep volume moderate and lift soft palate instead of pushing."
+        high_note_note = _HIGH_NOTE_NOTE
 
+    primary_focus = f"Priority focus: {_METRIC_LABELS[weakest_metric]}."
     lines = [
         f'{opener} On "{song_title}" by {artist}, {praise} ({strongest_score:.1f}%).',
-        f"Priority focus: {_METRIC_LABELS[weakest_metric]}. {primary_tip}",
+        f"{primary_focus} {primary_tip}",
     ]
+    fragments = [opener, f'On "{song_title}" by {artist},', praise]
+    fragments += _score_fragments(strongest_score) + [primary_focus, primary_tip]
     if secondary_tip:
-        lines.append(
-            f"Secondary focus: {_METRIC_LABELS[second_metric]}. {secondary_tip}"
-        )
+        secondary_focus = f"Secondary focus: {_METRIC_LABELS[second_metric]}."
+        lines.append(f"{secondary_focus} {secondary_tip}")
+        fragments += [secondary_focus, secondary_tip]
     lines.append(
-        f"Scores this take: pitch {pitch:.1f}%, timing {timing:.1f}%, stability {stability:.1f}%.{high_note_note}"
+        f"Scores this take: pitch {pitch:.1f}%, timing {timing:.1f}%, stability {stability:.1f}%."
+        + (f" {high_note_note}" if high_note_note else "")
     )
-    lines.append(closer)
+    for label, value in zip(_SCORE_LINE_FRAGMENTS, (pitch, timing, stability)):
+        fragments += [label] + _score_fragments(value)
+    fragments += [high_note_note, closer]
 
-    return " ".join(part.strip() for part in lines if part).strip()
+    text = " ".join(part.strip() for part in lines + [closer] if part).strip()
+    return text, [fragment for fragment in fragments if fragment]
 
 
-def get_feedback(
+def local_feedback(
     stats: Dict[str, float],
     song_title: str = "the song",
     artist: str = "the artist",
     judge_style: str = "encouraging",
+    seed: Optional[int] = None,
 ) -> str:
-    api_key = os.getenv("GROQ_API_KEY", "").strip()
-    if not api_key:
-        return local_feedback(stats, song_title, artist, judge_style)
+    return local_feedback_script(stats, song_title, artist, judge_style, seed)[0]
 
+
+def _build_prompt(
+    stats: Dict[str, float],
+    song_title: str,
+    artist: str,
+    judge_style: str,
+) -> str:
     style = STYLE_INSTRUCTIONS.get(
         judge_style.lower(),
         STYLE_INSTRUCTIONS["encouraging"],
     )
-    prompt = f"""
+    return f"""
 You are a professional singing competition judge.
 Style: {style}
 
@@ -230,17 +289,144 @@ Mention the strongest area and two concrete next drills.
 Keep it under 120 words.
 """.strip()
 
-    try:
-        client = Groq(api_key=api_key, timeout=API_TIMEOUT_SECONDS)
-        completion = client.chat.completions.create(
-            model=DEFAULT_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.85,
-        )
-        text = completion.choices[0].message.content
-        if isinstance(text, str) and text.strip():
-            return text.strip()
-    except Exception:
-        pass
 
-    return local_feedback(stats, song_title, artist, judge_style)
+def _completion_kwargs(prompt: str) -> dict:
+    return {
+        "model": DEFAULT_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.85,
+    }
+
+
+def _completion_text(completion) -> str:
+    text = completion.choices[0].message.content
+    return text.strip() if isinstance(text, str) else ""
+
+
+def _client_options(api_key: str) -> dict:
+    options = {"api_key": api_key, "timeout": API_TIMEOUT_SECONDS, "max_retries": API_MAX_RETRIES}
+    if API_BASE_URL:
+        options["base_url"] = API_BASE_URL
+    return options
+
+
+class FeedbackClient:
+    """Long-lived async Groq client for the API process.
+
+    One pooled HTTP client serves every request. ``complete`` is a plain
+    coroutine, so cancelling it (e.g. from ``asyncio.wait_for``) aborts the
+    HTTP call instead of leaving a thread blocked on it. Errors return None
+    and the caller falls back to local feedback, counted via
+    ``record_local``; cancellation propagates to the caller.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        max_connections: int = API_MAX_CONNECTIONS,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.api_key = (os.getenv("GROQ_API_KEY", "") if api_key is None else api_key).strip()
+        self.max_connections = max_connections
+        self._transport = transport
+        self._client: Optional[AsyncGroq] = None
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.local = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.api_key)
+
+    def start(self):
+        if self._client is not None or not self.enabled:
+            return
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+        )
+        http_client = httpx.AsyncClient(
+            limits=limits,
+            timeout=API_TIMEOUT_SECONDS,
+            transport=self._transport,
+        )
+        self._client = AsyncGroq(http_client=http_client, **_client_options(self.api_key))
+
+    async def close(self):
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.close()
+
+    def record_local(self):
+        self.local += 1
+
+    async def complete(
+        self,
+        stats: Dict[str, float],
+        song_title: str = "the song",
+        artist: str = "the artist",
+        judge_style: str = "encouraging",
+    ) -> Optional[str]:
+        """LLM feedback text, or None when the LLM is off or failed."""
+        if not self.enabled:
+            return None
+        self.start()
+
+        prompt = _build_prompt(stats, song_title, artist, judge_style)
+        try:
+            completion = await self._client.chat.completions.create(**_completion_kwargs(prompt))
+            text = _completion_text(completion)
+            if text:
+                self.completed += 1
+                return text
+            self.failed += 1
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        except Exception as exc:
+            self.failed += 1
+            logger.warning("Groq feedback failed: %s", exc)
+        return None
+
+    async def stream(
+        self,
+        stats: Dict[str, float],
+        song_title: str = "the song",
+        artist: str = "the artist",
+        judge_style: str = "encouraging",
+    ) -> AsyncIterator[str]:
+        """Yield LLM text deltas as they arrive; errors are raised to the caller."""
+        if not self.enabled:
+            return
+        self.start()
+
+        prompt = _build_prompt(stats, song_title, artist, judge_style)
+        response = None
+        try:
+            response = await self._client.chat.completions.create(stream=True, **_completion_kwargs(prompt))
+            async for chunk in response:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+            self.completed += 1
+        except (asyncio.CancelledError, GeneratorExit):
+            self.cancelled += 1
+            raise
+        except Exception as exc:
+            self.failed += 1
+            logger.warning("Groq feedback stream failed: %s", exc)
+            raise
+        finally:
+            if response is not None:
+                await response.close()
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "model": DEFAULT_MODEL,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "local": self.local,
+        }
@@ -0,0 +1,175 @@
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+LOG_LEVEL = os.getenv("AI_LOG_LEVEL", "INFO").strip().upper()
+LOG_FORMAT = os.getenv("AI_LOG_FORMAT", "json").strip().lower()
+LOG_QUEUE_SIZE = max(100, int(os.getenv("AI_LOG_QUEUE_SIZE", "10000")))
+# Per message template, for records below WARNING; 0 disables the limit.
+LOG_RATE_PER_SECOND = max(0.0, float(os.getenv("AI_LOG_RATE_PER_SECOND", "20")))
+LOG_RATE_BURST = max(1.0, float(os.getenv("AI_LOG_RATE_BURST", "50")))
+LOG_RATE_MAX_KEYS = 1024
+REQUEST_ID_MAX_LENGTH = 64
+
+ROOT_LOGGER = "musify"
+
+request_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="-")
+
+_STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional["_DroppingQueueHandler"] = None
+_rate_filter: Optional["_RateLimitFilter"] = None
+_configure_lock = threading.Lock()
+
+
+def new_request_id(incoming: str = "") -> str:
+    # Keep a caller's id when it is short and printable, so proxies can correlate.
+    incoming = (incoming or "").strip()
+    if incoming and len(incoming) <= REQUEST_ID_MAX_LENGTH and incoming.isprintable() and " " not in incoming:
+        return incoming
+    return uuid.uuid4().hex[:16]
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+class _RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class _RateLimitFilter(logging.Filter):
+    """Token bucket per (logger, message template) for records below WARNING."""
+
+    def __init__(self, rate: float, burst: float):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate <= 0 or record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            allowed = tokens >= 1.0
+            if allowed:
+                tokens -= 1.0
+            else:
+                self.suppressed += 1
+            if len(self._buckets) >= LOG_RATE_MAX_KEYS and key not in self._buckets:
+                self._buckets.clear()
+            self._buckets[key] = (tokens, now)
+        return allowed
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    # Never blocks the caller: a full queue drops the record and counts it.
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args and render the traceback here, where exc_info is still live,
+        # but leave the formatting to the writer thread.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        for name, value in vars(record).items():
+            if name not in _STANDARD_ATTRS and not name.startswith("_"):
+                entry[name] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+def _text_formatter() -> logging.Formatter:
+    return logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+
+def configure_logging(level: str = LOG_LEVEL, log_format: str = LOG_FORMAT) -> logging.Logger:
+    """Route the ``musify.*`` loggers through a bounded queue to a writer thread.
+
+    Callers only pay for a ``put_nowait``; stdout writes happen on the
+    listener thread, so a slow log pipe cannot stall the event loop.
+    """
+    global _listener, _queue_handler, _rate_filter
+    logger = logging.getLogger(ROOT_LOGGER)
+    with _configure_lock:
+        if _listener is not None:
+            return logger
+
+        log_queue: queue.Queue = queue.Queue(LOG_QUEUE_SIZE)
+        _rate_filter = _RateLimitFilter(LOG_RATE_PER_SECOND, LOG_RATE_BURST)
+        _queue_handler = _DroppingQueueHandler(log_queue)
+        _queue_handler.addFilter(_RequestIdFilter())
+        _queue_handler.addFilter(_rate_filter)
+
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(_JsonFormatter() if log_format == "json" else _text_formatter())
+        _listener = logging.handlers.QueueListener(log_queue, output)
+        _listener.start()
+        atexit.register(stop_logging)
+
+        logger.handlers = [_queue_handler]
+        logger.setLevel(getattr(logging, level, logging.INFO))
+        logger.propagate = False
+    return logger
+
+
+def stop_logging():
+    # Flushes whatever is still queued; safe to call more than once.
+    global _listener
+    with _configure_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        _listener = None
+        logging.getLogger(ROOT_LOGGER).handlers = []
+
+
+def snapshot() -> dict:
+    return {
+        "queued": _queue_handler.queue.qsize() if _queue_handler is not None else 0,
+        "dropped": _queue_handler.dropped if _queue_handler is not None else 0,
+        "suppressed": _rate_filter.suppressed if _rate_filter is not None else 0,
+    }
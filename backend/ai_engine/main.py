@@ -1,36 +1,89 @@
 import base64
 import asyncio
 import hashlib
+import json
+import logging
 import os
+import time
 import uuid
-import wave
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple, Union
 from urllib.parse import urlparse
 
-import requests
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, File, Form, Header, HTTPException, UploadFile, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel
+from starlette.formparsers import MultiPartParser
 
-from audio_analysis import generate_stats, get_audio_duration
-from llm_feedback import get_feedback, local_feedback
-from tts import generate_voice
+from audio_analysis import (
+    ANALYSIS_SAMPLE_RATE,
+    PCM_FORMATS,
+    AudioTooLongError,
+    DecodedAudio,
+    analysis_hop_length,
+    analysis_resample_quality,
+    decode_audio,
+    decode_pcm,
+    generate_batch_stats,
+    generate_stats_timed,
+    run_analysis_warmup,
+    take_score,
+)
+from llm_feedback import DEFAULT_MODEL, FeedbackClient, local_feedback_script
+from admission import AdmissionController, AdmissionRejected
+from analysis_pool import AnalysisPool
+from cache_manager import CacheManager
+from feedback_cache import FeedbackCache, feedback_cache_key, feedback_seed
+from logging_setup import configure_logging, new_request_id, request_id_var
+from logging_setup import snapshot as logging_snapshot
+from metrics import HTTP_LATENCY, HTTP_REQUESTS, JUDGE_EVENTS, StageTimer, render_metrics
+from phrase_bank import PHRASE_BANK_ENABLED, PHRASE_BANK_PRERENDER, PhraseBank, default_bank_dir
+from prefetch import ReferencePrefetcher
+from reference_download import ReferenceDownloader, ReferenceDownloadError, reference_cache_key
+from reference_store import ReferenceFeatureStore, compute_reference_features
+from streaming import StreamingAnalysis, StreamLimitExceeded
+from speech_pipeline import SPEECH_PIPELINE_ENABLED, speak_while_streaming
+from tts import get_tts_backend, stream_voice
 
 BASE_DIR = Path(__file__).resolve().parent
 TMP_DIR = BASE_DIR / "tmp"
 REFERENCE_CACHE_DIR = BASE_DIR / "reference_cache"
+REFERENCE_FEATURE_DIR = REFERENCE_CACHE_DIR / "features"
 
 MAX_UPLOAD_BYTES = int(os.getenv("AI_MAX_UPLOAD_BYTES", str(12 * 1024 * 1024)))
+UPLOAD_MEMORY_BYTES = max(0, int(os.getenv("AI_UPLOAD_MEMORY_BYTES", str(8 * 1024 * 1024))))
 MAX_AUDIO_SECONDS = float(os.getenv("AI_MAX_AUDIO_SECONDS", "60"))
-REFERENCE_TIMEOUT_SECONDS = int(os.getenv("AI_REFERENCE_TIMEOUT_SECONDS", "15"))
 LLM_TIMEOUT_SECONDS = float(os.getenv("AI_LLM_TIMEOUT_SECONDS", "10"))
 TTS_TIMEOUT_SECONDS = float(os.getenv("AI_TTS_TIMEOUT_SECONDS", "12"))
+STREAM_MAX_SESSIONS = max(1, int(os.getenv("AI_STREAM_MAX_SESSIONS", "8")))
+STREAM_IDLE_TIMEOUT_SECONDS = float(os.getenv("AI_STREAM_IDLE_TIMEOUT_SECONDS", "15"))
+STREAM_INTERIM_SECONDS = max(0.5, float(os.getenv("AI_STREAM_INTERIM_SECONDS", "2")))
+PREFETCH_MAX_ITEMS = max(1, int(os.getenv("AI_PREFETCH_MAX_ITEMS", "8")))
+JUDGE_BATCH_MAX_TAKES = max(1, int(os.getenv("AI_JUDGE_BATCH_MAX_TAKES", "8")))
+# Polled endpoints log their access lines at debug.
+QUIET_ACCESS_PATHS = {"/health", "/metrics"}
+
+logger = configure_logging()
+access_logger = logger.getChild("access")
 
 TMP_DIR.mkdir(parents=True, exist_ok=True)
+# Keep multipart parts in memory up to the same threshold, so small uploads never touch disk.
+MultiPartParser.spool_max_size = max(MultiPartParser.spool_max_size, UPLOAD_MEMORY_BYTES)
 REFERENCE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
+reference_features = ReferenceFeatureStore(REFERENCE_FEATURE_DIR)
+reference_downloads = ReferenceDownloader(REFERENCE_CACHE_DIR, MAX_UPLOAD_BYTES)
+reference_cache = CacheManager(REFERENCE_CACHE_DIR, TMP_DIR)
+analysis_pool = AnalysisPool(warmup_dir=TMP_DIR)
+feedback_client = FeedbackClient()
+feedback_cache = FeedbackCache()
+phrase_bank = PhraseBank(default_bank_dir()) if PHRASE_BANK_ENABLED else None
+phrase_bank_prerender: Optional[asyncio.Task] = None
+judge_admission = AdmissionController()
+active_streams = 0
+
 app = FastAPI(title="Musify Singing Judge AI")
 
 app.add_middleware(
@@ -74,6 +127,23 @@ def _safe_remove(path: Path):
         pass
 
 
+def _release_upload(upload):
+    # In-memory uploads need no cleanup; only overflow files live in TMP_DIR.
+    if isinstance(upload, Path):
+        _safe_remove(upload)
+
+
+def _analysis_source(upload):
+    return str(upload) if isinstance(upload, Path) else upload
+
+
+def _normalize_sha256(value: str) -> str:
+    candidate = (value or "").strip().lower()
+    if len(candidate) != 64 or any(ch not in "0123456789abcdef" for ch in candidate):
+        return ""
+    return candidate
+
+
 def _is_http_url(value: str) -> bool:
     try:
         parsed = urlparse(value)
@@ -82,168 +152,622 @@ def _is_http_url(value: str) -> bool:
         return False
 
 
-async def _save_upload(file: UploadFile, prefix: str = "user") -> Path:
+def _upload_suffix(file: UploadFile) -> str:
     suffix = Path(file.filename or "").suffix.lower()
     if not suffix or len(suffix) > 10:
         suffix = ".wav"
+    return suffix
 
-    target = TMP_DIR / f"{prefix}_{uuid.uuid4().hex}{suffix}"
+
+async def _save_upload(file: UploadFile, prefix: str = "user", hasher=None) -> Union[bytes, Path]:
+    # Uploads up to UPLOAD_MEMORY_BYTES stay in memory as bytes; larger ones
+    # overflow to a file in TMP_DIR.
+    chunks = []
+    target = None
+    out_file = None
     total = 0
 
     try:
-        with target.open("wb") as out_file:
-            while True:
-                chunk = await file.read(1024 * 1024)
-                if not chunk:
-                    break
-                total += len(chunk)
-                if total > MAX_UPLOAD_BYTES:
-                    raise HTTPException(
-                        status_code=413,
-                        detail=f"Audio file exceeds {MAX_UPLOAD_BYTES} bytes.",
-                    )
+        while True:
+            chunk = await file.read(1024 * 1024)
+            if not chunk:
+                break
+            total += len(chunk)
+            if total > MAX_UPLOAD_BYTES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Audio file exceeds {MAX_UPLOAD_BYTES} bytes.",
+                )
+            if hasher is not None:
+                hasher.update(chunk)
+            if out_file is None and total > UPLOAD_MEMORY_BYTES:
+                target = TMP_DIR / f"{prefix}_{uuid.uuid4().hex}{_upload_suffix(file)}"
+                out_file = target.open("wb")
+                out_file.writelines(chunks)
+                chunks = []
+            if out_file is not None:
                 out_file.write(chunk)
+            else:
+                chunks.append(chunk)
     except HTTPException:
+        if out_file is not None:
+            out_file.close()
         _safe_remove(target)
         raise
     except Exception as exc:
+        if out_file is not None:
+            out_file.close()
         _safe_remove(target)
         raise HTTPException(status_code=400, detail=f"Upload failed: {exc}") from exc
     finally:
         await file.close()
 
+    if out_file is not None:
+        out_file.close()
     if total == 0:
-        _safe_remove(target)
         raise HTTPException(status_code=400, detail="Uploaded audio is empty.")
 
-    return target
+    return target if target is not None else b"".join(chunks)
+
+
+def _pcm_format(value: str) -> str:
+    # Empty means an encoded container (WAV, FLAC, ...); otherwise raw PCM.
+    normalized = (value or "").strip().lower()
+    if normalized in {"", "wav", "container"}:
+        return ""
+    if normalized not in PCM_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported audio format '{normalized}'; use {', '.join(PCM_FORMATS)} or wav.",
+        )
+    return normalized
+
+
+def _decode_pcm_upload(upload, sample_format: str, sample_rate: str) -> DecodedAudio:
+    try:
+        rate = int(str(sample_rate).strip())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Raw PCM uploads need a sample_rate.")
+    if not 8000 <= rate <= 192000:
+        raise HTTPException(status_code=400, detail="Unsupported sample rate.")
+
+    data = upload.read_bytes() if isinstance(upload, Path) else upload
+    try:
+        return DecodedAudio(decode_pcm(data, sample_format), rate)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
-def _validate_duration(file_path: Path, label: str):
+def _too_long(label: str) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"{label} audio exceeds {int(MAX_AUDIO_SECONDS)} seconds.",
+    )
+
+
+def _decode_user_audio(audio, fast_mode: bool) -> DecodedAudio:
+    # One bounded decode both validates the length and yields the analysis buffer.
     try:
-        duration = get_audio_duration(str(file_path))
+        decoded = decode_audio(
+            audio,
+            ANALYSIS_SAMPLE_RATE,
+            analysis_resample_quality(fast_mode),
+            MAX_AUDIO_SECONDS,
+        )
+    except AudioTooLongError as exc:
+        raise _too_long("User") from exc
     except Exception as exc:
-        message = str(exc).strip() or f"Could not read {label} audio."
+        message = str(exc).strip() or "Could not read User audio."
         raise HTTPException(status_code=400, detail=message) from exc
-    if duration <= 0:
-        raise HTTPException(status_code=400, detail=f"Could not read {label} audio.")
-    if duration > MAX_AUDIO_SECONDS:
-        raise HTTPException(
-            status_code=413,
-            detail=f"{label} audio exceeds {int(MAX_AUDIO_SECONDS)} seconds.",
-        )
+    if decoded.samples.size == 0:
+        raise HTTPException(status_code=400, detail="Could not read User audio.")
+    return decoded
 
 
-def _download_reference(reference_url: str) -> Path:
+async def _download_reference(reference_url: str):
     url = reference_url.strip()
     if not _is_http_url(url):
         raise HTTPException(status_code=400, detail="Invalid reference URL.")
+    try:
+        return await reference_downloads.fetch(url)
+    except ReferenceDownloadError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail) from exc
 
-    parsed = urlparse(url)
-    suffix = Path(parsed.path).suffix.lower()
-    if not suffix or len(suffix) > 10:
-        suffix = ".audio"
 
-    cache_key = hashlib.sha256(url.encode("utf-8")).hexdigest()
-    target = REFERENCE_CACHE_DIR / f"{cache_key}{suffix}"
-    partial = REFERENCE_CACHE_DIR / f"{cache_key}{suffix}.part"
+def _cached_reference_blob(cache_key: str) -> Optional[Path]:
+    for candidate in REFERENCE_CACHE_DIR.glob(f"{cache_key}.*"):
+        if candidate.suffix in {".part", ".meta"} or not candidate.is_file():
+            continue
+        if candidate.stat().st_size > 0:
+            return candidate
+    return None
 
-    if target.exists() and target.stat().st_size > 0:
-        return target
 
-    try:
-        response = requests.get(
-            url,
-            timeout=REFERENCE_TIMEOUT_SECONDS,
-            stream=True,
-            headers={"User-Agent": "Musify-AI/1.0"},
-        )
-        response.raise_for_status()
-    except Exception as exc:
-        raise HTTPException(
-            status_code=502,
-            detail=f"Failed to download reference track: {exc}",
-        ) from exc
+def _store_uploaded_reference(upload, suffix: str, content_key: str) -> Path:
+    # Uploaded references are content-addressed: keep the blob for reuse.
+    cached = REFERENCE_CACHE_DIR / f"{content_key}{suffix}"
+    if isinstance(upload, Path):
+        os.replace(upload, cached)
+        return cached
 
-    total = 0
+    partial = REFERENCE_CACHE_DIR / f"{content_key}{suffix}.part"
     try:
-        with partial.open("wb") as out_file:
-            for chunk in response.iter_content(chunk_size=8192):
-                if not chunk:
-                    continue
-                total += len(chunk)
-                if total > MAX_UPLOAD_BYTES:
-                    raise HTTPException(
-                        status_code=413,
-                        detail=f"Reference track exceeds {MAX_UPLOAD_BYTES} bytes.",
-                    )
-                out_file.write(chunk)
-        if total == 0:
-            raise HTTPException(status_code=502, detail="Reference track is empty.")
-        partial.replace(target)
+        partial.write_bytes(upload)
+        partial.replace(cached)
     finally:
         _safe_remove(partial)
+    return cached
+
+
+async def _analyze_reference(cache_key: str, hop_length: int, audio):
+    # The decode enforces the length limit, so there is no separate duration pass.
+    try:
+        computed = await analysis_pool.run(
+            compute_reference_features,
+            _analysis_source(audio),
+            hop_length,
+            MAX_AUDIO_SECONDS,
+        )
+    except AudioTooLongError as exc:
+        raise _too_long("Reference") from exc
+    await run_in_threadpool(reference_features.put_many, cache_key, computed)
+    return computed[hop_length]
+
+
+async def _resolve_reference_features(reference_url: str, fast_mode: bool):
+    # Cached features make the download and analysis free until max-age.
+    cache_key = reference_cache_key(reference_url)
+    hop_length = analysis_hop_length(fast_mode)
+    features = await run_in_threadpool(reference_features.get, cache_key, hop_length)
+    reference_cache.record(cache_key, hit=features is not None)
+    if features is not None and reference_downloads.is_fresh(reference_url):
+        return features
+
+    try:
+        reference_path, changed = await _download_reference(reference_url)
+    except HTTPException:
+        if features is None:
+            raise
+        return features
+    if features is not None and not changed:
+        return features
+    try:
+        return await _analyze_reference(cache_key, hop_length, reference_path)
+    except HTTPException:
+        # Too long or unreadable: do not keep serving the same bad download.
+        _safe_remove(reference_path)
+        _safe_remove(reference_downloads.meta_path(reference_path))
+        raise
+
+
+async def _resolve_known_reference(content_key: str, fast_mode: bool):
+    hop_length = analysis_hop_length(fast_mode)
+    features = await run_in_threadpool(reference_features.get, content_key, hop_length)
+    reference_cache.record(content_key, hit=features is not None)
+    if features is not None:
+        return features
+    cached = _cached_reference_blob(content_key)
+    if cached is None:
+        return None
+    return await _analyze_reference(content_key, hop_length, cached)
+
 
-    return target
+async def _resolve_uploaded_reference(upload, suffix: str, content_key: str, fast_mode: bool):
+    features = await _resolve_known_reference(content_key, fast_mode)
+    if features is not None:
+        return features
 
+    # Analyse before caching so an oversized upload never reaches the store.
+    features = await _analyze_reference(content_key, analysis_hop_length(fast_mode), upload)
+    await run_in_threadpool(_store_uploaded_reference, upload, suffix, content_key)
+    return features
 
-def _write_silent_wav(path: Path, sample_rate: int = 16000, seconds: float = 1.0):
-    frames = max(1, int(sample_rate * seconds))
-    silence_frame = (0).to_bytes(2, byteorder="little", signed=True)
-    with wave.open(str(path), "wb") as wav_file:
-        wav_file.setnchannels(1)
-        wav_file.setsampwidth(2)
-        wav_file.setframerate(sample_rate)
-        wav_file.writeframes(silence_frame * frames)
+
+async def _prefetch_reference(kind: str, value: str) -> bool:
+    # Warms every hop length at once, so either judge mode finds the features.
+    if kind == "url":
+        await _resolve_reference_features(value, fast_mode=False)
+        return True
+    return await _resolve_known_reference(value, fast_mode=False) is not None
+
+
+def _judges_active() -> bool:
+    return judge_admission.in_flight > 0 or judge_admission.queued > 0
+
+
+reference_prefetcher = ReferencePrefetcher(
+    _prefetch_reference,
+    _judges_active,
+    reference_features.contains,
+)
+
+
+async def _resolve_named_reference(
+    reference_url: str,
+    content_key: str,
+    fast_mode: bool,
+    reference_warning: str = "",
+):
+    # Returns (features or None, warning); a missing reference never fails the judge.
+    features = None
+    if content_key:
+        try:
+            features = await _resolve_known_reference(content_key, fast_mode)
+        except Exception as exc:
+            reference_warning = str(exc).strip() or "Reference track unavailable."
+            logger.warning("Cached reference skipped: %s", reference_warning)
+            features = None
+        if features is None and not reference_warning and not reference_url.strip():
+            reference_warning = "Reference hash is not cached; upload the reference file."
+
+    if features is None and reference_url and reference_url != "undefined":
+        try:
+            features = await _resolve_reference_features(reference_url, fast_mode)
+        except HTTPException as exc:
+            reference_warning = str(exc.detail) if exc.detail else "Reference track unavailable."
+            logger.warning("Reference skipped: %s", reference_warning)
+            features = None
+        except Exception as exc:
+            reference_warning = str(exc).strip() or "Reference track unavailable."
+            logger.warning("Reference skipped: %s", reference_warning)
+            features = None
+    return features, reference_warning
+
+
+async def _prepare_user_audio(upload, pcm_format: str, sample_rate: str, fast_mode: bool) -> DecodedAudio:
+    if pcm_format:
+        source = _decode_pcm_upload(upload, pcm_format, sample_rate)
+    else:
+        source = _analysis_source(upload)
+    return await run_in_threadpool(_decode_user_audio, source, fast_mode)
+
+
+async def _resolve_judge_reference(
+    reference_file: Optional[UploadFile],
+    reference_url: str,
+    reference_content_key: str,
+    fast_mode: bool,
+):
+    # An uploaded reference wins; otherwise the hash, then the preview URL.
+    reference_feature_set = None
+    reference_warning = ""
+    reference_uploaded = reference_file is not None and bool((reference_file.filename or "").strip())
+    if reference_uploaded:
+        reference_upload = None
+        try:
+            reference_digest = hashlib.sha256()
+            reference_suffix = _upload_suffix(reference_file)
+            reference_upload = await _save_upload(
+                reference_file,
+                prefix="reference",
+                hasher=reference_digest,
+            )
+            reference_feature_set = await _resolve_uploaded_reference(
+                reference_upload,
+                reference_suffix,
+                reference_digest.hexdigest(),
+                fast_mode,
+            )
+        except HTTPException as exc:
+            reference_warning = str(exc.detail) if exc.detail else "Reference track unavailable."
+            logger.warning("Reference upload skipped: %s", reference_warning)
+        except Exception as exc:
+            reference_warning = str(exc).strip() or "Reference track unavailable."
+            logger.warning("Reference upload skipped: %s", reference_warning)
+        finally:
+            _release_upload(reference_upload)
+
+    if reference_feature_set is None:
+        reference_feature_set, reference_warning = await _resolve_named_reference(
+            reference_url,
+            "" if reference_uploaded else reference_content_key,
+            fast_mode,
+            reference_warning,
+        )
+    return reference_feature_set, reference_warning
+
+
+async def _stream_spoken_feedback(
+    stats: dict,
+    title: str,
+    artist: str,
+    style: str,
+    timer: StageTimer,
+) -> Tuple[Optional[str], Optional[bytes]]:
+    # TTS starts on the first finished sentence instead of after the whole reply.
+    started = time.perf_counter()
+    try:
+        spoken = await speak_while_streaming(
+            feedback_client.stream(stats, title, artist, style),
+            stream_voice,
+            LLM_TIMEOUT_SECONDS,
+            TTS_TIMEOUT_SECONDS,
+        )
+    except asyncio.TimeoutError:
+        JUDGE_EVENTS.inc(event="llm_timeout")
+        timer.add("llm", time.perf_counter() - started)
+        return None, None
+    except Exception:
+        timer.add("llm", time.perf_counter() - started)
+        return None, None
+
+    timer.add("llm", spoken.llm_seconds)
+    timer.add("tts", spoken.tts_seconds)
+    if spoken.first_audio_seconds is not None:
+        timer.add("first_audio", spoken.first_audio_seconds)
+    if spoken.tts_error:
+        JUDGE_EVENTS.inc(event=f"tts_{spoken.tts_error}")
+    return spoken.text or None, spoken.audio
+
+
+async def _compose_feedback(
+    stats: dict,
+    title: str,
+    artist: str,
+    style: str,
+    use_llm: bool,
+    use_tts: bool,
+    timer: Optional[StageTimer] = None,
+):
+    timer = timer or StageTimer()
+    spoken_audio = None
+    # Set when the text is template feedback, which the phrase bank can voice offline.
+    fragments = None
+    if use_llm and feedback_client.enabled:
+        cache_key = feedback_cache_key(stats, title, artist, style, DEFAULT_MODEL)
+        feedback_text = feedback_cache.get(cache_key)
+        if feedback_text is None:
+            if use_tts and SPEECH_PIPELINE_ENABLED:
+                feedback_text, spoken_audio = await _stream_spoken_feedback(stats, title, artist, style, timer)
+            else:
+                try:
+                    with timer.stage("llm"):
+                        # Cancelling the coroutine aborts the HTTP call; no thread is left waiting.
+                        feedback_text = await asyncio.wait_for(
+                            feedback_client.complete(
+                                stats,
+                                title,
+                                artist,
+                                style,
+                            ),
+                            timeout=LLM_TIMEOUT_SECONDS,
+                        )
+                except asyncio.TimeoutError:
+                    JUDGE_EVENTS.inc(event="llm_timeout")
+            if feedback_text:
+                feedback_cache.put(cache_key, feedback_text)
+            else:
+                # Fallbacks are not cached, but the same stats bucket reads the same.
+                feedback_client.record_local()
+                spoken_audio = None
+                feedback_text, fragments = local_feedback_script(
+                    stats,
+                    title,
+                    artist,
+                    style,
+                    seed=feedback_seed(cache_key),
+                )
+    else:
+        feedback_text, fragments = local_feedback_script(
+            stats,
+            title,
+            artist,
+            style,
+        )
+
+    if spoken_audio is None and use_tts:
+        try:
+            with timer.stage("tts"):
+                if fragments is not None and phrase_bank is not None:
+                    synthesis = phrase_bank.speak(fragments, feedback_text)
+                else:
+                    synthesis = get_tts_backend().synthesize(feedback_text)
+                spoken_audio = await asyncio.wait_for(synthesis, timeout=TTS_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            JUDGE_EVENTS.inc(event="tts_timeout")
+        except Exception:
+            JUDGE_EVENTS.inc(event="tts_error")
+
+    audio_b64 = base64.b64encode(spoken_audio).decode("utf-8") if spoken_audio else ""
+    return feedback_text, audio_b64
 
 
 def _run_analysis_warmup():
-    warmup_user = TMP_DIR / f"warmup_user_{uuid.uuid4().hex}.wav"
-    warmup_reference = TMP_DIR / f"warmup_reference_{uuid.uuid4().hex}.wav"
     try:
-        _write_silent_wav(warmup_user)
-        _write_silent_wav(warmup_reference)
-        generate_stats(str(warmup_user), str(warmup_reference), fast_mode=True)
-        print("Audio analysis warmup completed.")
+        run_analysis_warmup(TMP_DIR)
+        logger.info("Audio analysis warmup completed.")
     except Exception as exc:
-        print(f"Audio analysis warmup skipped: {exc}")
-    finally:
-        _safe_remove(warmup_user)
-        _safe_remove(warmup_reference)
+        logger.warning("Audio analysis warmup skipped: %s", exc)
 
 
 async def _warmup_analysis_pipeline():
-    await run_in_threadpool(_run_analysis_warmup)
+    if analysis_pool.uses_processes:
+        await analysis_pool.start()
+    if not analysis_pool.uses_processes:
+        # Thread mode, or a pool that failed to start, analyses in this process.
+        await run_in_threadpool(_run_analysis_warmup)
 
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     import traceback
-    print(f"CRITICAL ERROR: {exc}")
-    print(traceback.format_exc())
+    logger.error("Unhandled error on %s %s: %s", request.method, request.url.path, exc, exc_info=exc)
     return JSONResponse(
         status_code=500,
         content={"error": str(exc), "traceback": traceback.format_exc()},
     )
 
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"error": exc.detail, "queue": judge_admission.snapshot()},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    print(f"Incoming request: {request.method} {request.url.path}")
-    response = await call_next(request)
-    print(f"Response status: {response.status_code} for {request.url.path}")
-    return response
+    request_id = new_request_id(request.headers.get("x-request-id", ""))
+    token = request_id_var.set(request_id)
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        response.headers["X-Request-ID"] = request_id
+        return response
+    finally:
+        elapsed = time.perf_counter() - started
+        # Label by route template, so hashes in paths do not explode the series.
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        HTTP_REQUESTS.inc(route=route, method=request.method, status=str(status_code))
+        HTTP_LATENCY.observe(elapsed, route=route)
+        access_logger.log(
+            logging.DEBUG if request.url.path in QUIET_ACCESS_PATHS else logging.INFO,
+            "%s %s %d",
+            request.method,
+            request.url.path,
+            status_code,
+            extra={"route": route, "status": status_code, "duration_ms": round(elapsed * 1000.0, 1)},
+        )
+        request_id_var.reset(token)
 
 @app.on_event("startup")
 async def startup_event():
-    print("Registered routes:")
-    for route in app.routes:
-        if hasattr(route, "path"):
-            print(f"  {route.path} {getattr(route, 'methods', [])}")
+    global phrase_bank_prerender
+    logger.info(
+        "Registered %d routes.",
+        len(app.routes),
+        extra={"routes": sorted(route.path for route in app.routes if hasattr(route, "path"))},
+    )
     asyncio.create_task(_warmup_analysis_pipeline())
+    feedback_client.start()
+    if phrase_bank is not None and PHRASE_BANK_PRERENDER:
+        phrase_bank_prerender = asyncio.create_task(phrase_bank.prerender())
+    reference_cache.start()
+    reference_prefetcher.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    analysis_pool.shutdown()
+    await reference_downloads.close()
+    await feedback_client.close()
+    if phrase_bank_prerender is not None:
+        phrase_bank_prerender.cancel()
+    if phrase_bank is not None:
+        await phrase_bank.close()
+    await run_in_threadpool(feedback_cache.save)
+    await reference_prefetcher.stop()
+    await reference_cache.stop()
 
 @app.get("/health")
 async def health():
-    return {"ok": True, "service": "musify-singing-judge"}
+    return {
+        "ok": True,
+        "service": "musify-singing-judge",
+        "analysis": analysis_pool.snapshot(),
+        "admission": judge_admission.snapshot(),
+        "streams": {"active": active_streams, "max": STREAM_MAX_SESSIONS},
+        "reference_downloads": reference_downloads.snapshot(),
+        "reference_cache": reference_cache.snapshot(),
+        "prefetch": reference_prefetcher.snapshot(),
+        "logging": logging_snapshot(),
+        "llm": feedback_client.snapshot(),
+        "feedback_cache": feedback_cache.snapshot(),
+        "phrase_bank": phrase_bank.snapshot() if phrase_bank is not None else None,
+    }
+
+
+class PrefetchRequest(BaseModel):
+    urls: List[str] = []
+    hashes: List[str] = []
+
+
+@app.post("/references/prefetch", status_code=202)
+async def prefetch_references(request: PrefetchRequest):
+    if len(request.urls) + len(request.hashes) > PREFETCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {PREFETCH_MAX_ITEMS} references per prefetch.",
+        )
+
+    items = []
+    for value in request.urls:
+        url = value.strip()
+        if not _is_http_url(url):
+            items.append({"url": url, "state": "invalid"})
+            continue
+        status = reference_prefetcher.submit(reference_cache_key(url), "url", url)
+        items.append({"url": url, **status})
+    for value in request.hashes:
+        content_key = _normalize_sha256(value)
+        if not content_key:
+            items.append({"sha256": value, "state": "invalid"})
+            continue
+        status = reference_prefetcher.submit(content_key, "sha256", content_key)
+        items.append({"sha256": content_key, **status})
+    return {"items": items}
+
+
+@app.get("/metrics")
+async def metrics():
+    admission = judge_admission.snapshot()
+    cache = reference_cache.snapshot()
+    downloads = reference_downloads.snapshot()
+    prefetch = reference_prefetcher.snapshot()
+    log_state = logging_snapshot()
+    feedback = feedback_cache.snapshot()
+    gauges = {
+        "musify_judge_in_flight": admission["in_flight"],
+        "musify_judge_queued": admission["queued"],
+        "musify_judge_streams_active": active_streams,
+        "musify_reference_cache_bytes": cache["size_bytes"],
+        "musify_prefetch_queued": prefetch["queued"],
+        "musify_feedback_cache_items": feedback["items"],
+        "musify_feedback_cache_hit_rate": feedback["hit_rate"],
+        "musify_log_queue_depth": log_state["queued"],
+    }
+    totals = {
+        "musify_judge_admitted_total": admission["admitted"],
+        "musify_judge_rejected_queue_full_total": admission["rejected_queue_full"],
+        "musify_judge_rejected_wait_timeout_total": admission["rejected_wait_timeout"],
+        "musify_reference_cache_hits_total": cache["hits"],
+        "musify_reference_cache_misses_total": cache["misses"],
+        "musify_reference_cache_evictions_total": cache["evictions"],
+        "musify_reference_downloads_total": downloads["downloaded"],
+        "musify_reference_revalidations_total": downloads["revalidated"],
+        "musify_reference_downloads_coalesced_total": downloads["coalesced"],
+        "musify_reference_stale_served_total": downloads["stale_served"],
+        "musify_prefetch_failed_total": prefetch["failed"],
+        "musify_feedback_cache_hits_total": feedback["hits"],
+        "musify_feedback_cache_misses_total": feedback["misses"],
+        "musify_log_records_dropped_total": log_state["dropped"],
+        "musify_log_records_suppressed_total": log_state["suppressed"],
+    }
+    return PlainTextResponse(render_metrics(gauges, totals), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/references/prefetch/{prefetch_id}")
+async def prefetch_status(prefetch_id: str):
+    key = _normalize_sha256(prefetch_id)
+    if not key:
+        raise HTTPException(status_code=400, detail="Invalid prefetch id.")
+    status = reference_prefetcher.status(key)
+    if status is None:
+        known = reference_features.contains(key)
+        status = {"id": key, "state": "ready" if known else "unknown"}
+    return status
+
+
+@app.get("/references/{reference_sha256}")
+async def reference_status(reference_sha256: str):
+    content_key = _normalize_sha256(reference_sha256)
+    if not content_key:
+        raise HTTPException(status_code=400, detail="Invalid reference hash.")
+    known = reference_features.contains(content_key) or (
+        _cached_reference_blob(content_key) is not None
+    )
+    return {"sha256": content_key, "known": known}
 
 
 @app.post("/judge")
@@ -251,19 +775,25 @@ async def judge_song(
     file: UploadFile = File(...),
     reference_file: Optional[UploadFile] = File(default=None),
     reference_url: str = Form(default=""),
+    reference_sha256: str = Form(default=""),
     reference_title: str = Form(default="Unknown"),
     reference_artist: str = Form(default="Unknown"),
     judge_style: str = Form(default="encouraging"),
     fast_mode: str = Form(default="0"),
     include_tts: str = Form(default="1"),
     include_llm: str = Form(default="1"),
+    include_timings: str = Form(default="0"),
+    audio_format: str = Form(default=""),
+    sample_rate: str = Form(default=""),
+    x_audio_format: str = Header(default=""),
+    x_audio_sample_rate: str = Header(default=""),
 ):
-    user_file_path = await _save_upload(file, prefix="user")
-    reference_file_path = None
-    reference_file_is_temp = False
-    reference_warning = ""
-    output_audio_path = None
+    timer = StageTimer()
+    with timer.stage("upload"):
+        user_audio = await _save_upload(file, prefix="user")
+    admitted_at = None
 
+    reference_content_key = _normalize_sha256(reference_sha256)
     safe_title = _safe_text(reference_title)
     safe_artist = _safe_text(reference_artist)
     safe_style = _safe_text(judge_style, fallback="encouraging", max_length=30).lower()
@@ -275,66 +805,57 @@ async def judge_song(
         use_tts = False
 
     try:
-        _validate_duration(user_file_path, "User")
-
-        if reference_file is not None and (reference_file.filename or "").strip():
-            try:
-                reference_file_path = await _save_upload(reference_file, prefix="reference")
-                reference_file_is_temp = True
-                _validate_duration(reference_file_path, "Reference")
-            except HTTPException as exc:
-                reference_warning = str(exc.detail) if exc.detail else "Reference track unavailable."
-                print(f"Reference upload skipped: {reference_warning}")
-                if reference_file_path and reference_file_is_temp:
-                    _safe_remove(reference_file_path)
-                reference_file_path = None
-                reference_file_is_temp = False
-            except Exception as exc:
-                reference_warning = str(exc).strip() or "Reference track unavailable."
-                print(f"Reference upload skipped: {reference_warning}")
-                if reference_file_path and reference_file_is_temp:
-                    _safe_remove(reference_file_path)
-                reference_file_path = None
-                reference_file_is_temp = False
-        elif reference_url and reference_url != "undefined":
-            try:
-                reference_file_path = await run_in_threadpool(
-                    _download_reference,
-                    reference_url,
-                )
-                _validate_duration(reference_file_path, "Reference")
-            except HTTPException as exc:
-                reference_warning = str(exc.detail) if exc.detail else "Reference track unavailable."
-                print(f"Reference skipped: {reference_warning}")
-                reference_file_path = None
-            except Exception as exc:
-                reference_warning = str(exc).strip() or "Reference track unavailable."
-                print(f"Reference skipped: {reference_warning}")
-                reference_file_path = None
+        # The reference download is network-bound, so it happens before the slot;
+        # a cold reference's analysis is still bounded by the pool's own queue.
+        with timer.stage("reference"):
+            reference_feature_set, reference_warning = await _resolve_judge_reference(
+                reference_file,
+                reference_url,
+                reference_content_key,
+                fast_requested,
+            )
 
-        try:
-            stats = await run_in_threadpool(
-                generate_stats,
-                str(user_file_path),
-                str(reference_file_path) if reference_file_path else None,
+        # Bound concurrent analysis; LLM and TTS below run outside the slot.
+        with timer.stage("queue"):
+            admitted_at = await judge_admission.acquire()
+        with timer.stage("decode"):
+            user_source = await _prepare_user_audio(
+                user_audio,
+                _pcm_format(audio_format or x_audio_format),
+                sample_rate or x_audio_sample_rate,
                 fast_requested,
             )
+        _release_upload(user_audio)
+        user_audio = None
+
+        try:
+            # Worker-side stage times come back with the stats, across the pool.
+            with timer.stage("analysis"):
+                stats, analysis_timings = await analysis_pool.run(
+                    generate_stats_timed,
+                    user_source,
+                    None,
+                    fast_requested,
+                    reference_feature_set,
+                )
         except Exception as exc:
-            if reference_file_path:
+            if reference_feature_set is not None:
+                JUDGE_EVENTS.inc(event="reference_comparison_fallback")
                 reference_warning = (
                     reference_warning
                     or str(exc).strip()
                     or "Reference comparison unavailable."
                 )
-                print(f"Reference comparison failed; retrying without reference: {reference_warning}")
-                reference_file_path = None
+                logger.warning("Reference comparison failed; retrying without reference: %s", reference_warning)
+                reference_feature_set = None
                 try:
-                    stats = await run_in_threadpool(
-                        generate_stats,
-                        str(user_file_path),
-                        None,
-                        fast_requested,
-                    )
+                    with timer.stage("analysis"):
+                        stats, analysis_timings = await analysis_pool.run(
+                            generate_stats_timed,
+                            user_source,
+                            None,
+                            fast_requested,
+                        )
                 except Exception as inner_exc:
                     message = str(inner_exc).strip() or "Could not process uploaded audio."
                     raise HTTPException(status_code=400, detail=message) from inner_exc
@@ -342,59 +863,326 @@ async def judge_song(
                 message = str(exc).strip() or "Could not process uploaded audio."
                 raise HTTPException(status_code=400, detail=message) from exc
 
-        if use_llm:
+        judge_admission.release(admitted_at)
+        admitted_at = None
+        # The worker's decode is its own stage, apart from the request-side decode.
+        for stage, seconds in analysis_timings.items():
+            timer.add("worker_decode" if stage == "decode" else stage, seconds)
+        if reference_warning:
+            JUDGE_EVENTS.inc(event="reference_warning")
+
+        feedback_text, audio_b64 = await _compose_feedback(
+            stats,
+            safe_title,
+            safe_artist,
+            safe_style,
+            use_llm,
+            use_tts,
+            timer,
+        )
+
+        response = {
+            "stats": stats,
+            "text": feedback_text,
+            "audio_base64": audio_b64,
+            "reference_used": reference_feature_set is not None,
+            "reference_warning": reference_warning,
+        }
+        if _to_bool(include_timings, default=False):
+            response["timings"] = timer.as_ms()
+        return response
+    finally:
+        if admitted_at is not None:
+            judge_admission.release(admitted_at)
+        _release_upload(user_audio)
+        timer.observe()
+
+
+@app.post("/judge/batch")
+async def judge_batch(
+    files: List[UploadFile] = File(...),
+    reference_file: Optional[UploadFile] = File(default=None),
+    reference_url: str = Form(default=""),
+    reference_sha256: str = Form(default=""),
+    reference_title: str = Form(default="Unknown"),
+    reference_artist: str = Form(default="Unknown"),
+    judge_style: str = Form(default="encouraging"),
+    fast_mode: str = Form(default="0"),
+    include_tts: str = Form(default="1"),
+    include_llm: str = Form(default="1"),
+    audio_format: str = Form(default=""),
+    sample_rate: str = Form(default=""),
+    x_audio_format: str = Header(default=""),
+    x_audio_sample_rate: str = Header(default=""),
+):
+    if len(files) > JUDGE_BATCH_MAX_TAKES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {JUDGE_BATCH_MAX_TAKES} takes per batch.",
+        )
+
+    safe_title = _safe_text(reference_title)
+    safe_artist = _safe_text(reference_artist)
+    safe_style = _safe_text(judge_style, fallback="encouraging", max_length=30).lower()
+    fast_requested = _to_bool(fast_mode, default=False)
+    use_llm = _to_bool(include_llm, default=not fast_requested) and not fast_requested
+    use_tts = _to_bool(include_tts, default=not fast_requested) and not fast_requested
+    pcm_format = _pcm_format(audio_format or x_audio_format)
+    takes = [
+        {"index": index, "filename": _safe_text(upload.filename or "", fallback=f"take-{index + 1}")}
+        for index, upload in enumerate(files)
+    ]
+    user_uploads = [None] * len(files)
+    admitted_at = None
+
+    try:
+        # Uploads and the reference are read before the slot, as in /judge;
+        # an empty or oversized take fails only itself.
+        for index, (take, upload) in enumerate(zip(takes, files)):
             try:
-                feedback_text = await asyncio.wait_for(
-                    run_in_threadpool(
-                        get_feedback,
-                        stats,
-                        safe_title,
-                        safe_artist,
-                        safe_style,
-                    ),
-                    timeout=LLM_TIMEOUT_SECONDS,
-                )
-            except asyncio.TimeoutError:
-                feedback_text = local_feedback(
-                    stats,
-                    safe_title,
-                    safe_artist,
-                    safe_style,
-                )
-        else:
-            feedback_text = local_feedback(
-                stats,
-                safe_title,
-                safe_artist,
-                safe_style,
-            )
+                user_uploads[index] = await _save_upload(upload, prefix="user")
+            except HTTPException as exc:
+                take["error"] = str(exc.detail)
 
-        audio_b64 = ""
-        if use_tts:
-            output_audio_path = TMP_DIR / f"feedback_{uuid.uuid4().hex}.mp3"
+        reference_feature_set, reference_warning = await _resolve_judge_reference(
+            reference_file,
+            reference_url,
+            _normalize_sha256(reference_sha256),
+            fast_requested,
+        )
+
+        # One admission slot for the whole batch: it is one unit of analysis work.
+        admitted_at = await judge_admission.acquire()
+        sources = []
+        for index, take in enumerate(takes):
+            if "error" in take:
+                continue
             try:
-                await asyncio.wait_for(
-                    generate_voice(feedback_text, str(output_audio_path)),
-                    timeout=TTS_TIMEOUT_SECONDS,
+                sources.append(
+                    await _prepare_user_audio(
+                        user_uploads[index],
+                        pcm_format,
+                        sample_rate or x_audio_sample_rate,
+                        fast_requested,
+                    )
                 )
-                with output_audio_path.open("rb") as audio_file:
-                    audio_b64 = base64.b64encode(audio_file.read()).decode("utf-8")
-            except (asyncio.TimeoutError, Exception):
-                audio_b64 = ""
+            except HTTPException as exc:
+                take["error"] = str(exc.detail)
+            finally:
+                _release_upload(user_uploads[index])
+                user_uploads[index] = None
+
+        scored = [take for take in takes if "error" not in take]
+        if scored:
+            results = await analysis_pool.run(
+                generate_batch_stats,
+                sources,
+                fast_requested,
+                reference_feature_set,
+            )
+            for take, result in zip(scored, results):
+                take.update(result)
+                if "stats" in result:
+                    take["score"] = take_score(result["stats"])
+
+        judge_admission.release(admitted_at)
+        admitted_at = None
+
+        ranked = [take for take in takes if "stats" in take]
+        if not ranked:
+            message = next((take["error"] for take in takes if "error" in take), "")
+            raise HTTPException(status_code=400, detail=message or "Could not process uploaded audio.")
+        best = max(ranked, key=lambda take: take["score"])
+
+        # Feedback is written for the best take only.
+        feedback_text, audio_b64 = await _compose_feedback(
+            best["stats"],
+            safe_title,
+            safe_artist,
+            safe_style,
+            use_llm,
+            use_tts,
+        )
 
         return {
-            "stats": stats,
+            "takes": takes,
+            "best_take": best["index"],
             "text": feedback_text,
             "audio_base64": audio_b64,
-            "reference_used": bool(reference_file_path),
+            "reference_used": reference_feature_set is not None,
             "reference_warning": reference_warning,
         }
     finally:
-        _safe_remove(user_file_path)
-        if reference_file_path and reference_file_is_temp:
-            _safe_remove(reference_file_path)
-        if output_audio_path:
-            _safe_remove(output_audio_path)
+        if admitted_at is not None:
+            judge_admission.release(admitted_at)
+        for user_audio in user_uploads:
+            _release_upload(user_audio)
+
+
+async def _send_stream_error(websocket: WebSocket, status_code: int, message: str, close_code: int):
+    try:
+        await websocket.send_json({"type": "error", "status": status_code, "error": message})
+        await websocket.close(code=close_code)
+    except Exception:
+        pass
+
+
+def _stream_control(text: str) -> Optional[dict]:
+    try:
+        message = json.loads(text)
+    except ValueError:
+        return None
+    return message if isinstance(message, dict) else None
+
+
+@app.websocket("/judge/stream")
+async def judge_stream(websocket: WebSocket):
+    """Live judge: scores PCM while it is being recorded.
+
+    The client sends one JSON config message (``sample_rate``, ``format`` of
+    ``f32le`` or ``s16le``, ``reference_url``/``reference_sha256``, ``title``,
+    ``artist``, ``style``, ``fast_mode``, ``include_llm``, ``include_tts``,
+    ``interim``, ``normalize_peak``), then binary mono PCM chunks, then
+    ``{"type": "end"}``. The server answers ``ready``, optional ``interim``
+    stats and a final ``result`` shaped like the ``/judge`` response.
+    """
+    global active_streams
+    request_id_var.set(new_request_id(websocket.headers.get("x-request-id", "")))
+    await websocket.accept()
+    if active_streams >= STREAM_MAX_SESSIONS:
+        await _send_stream_error(websocket, 429, "Too many live judge sessions.", 1013)
+        return
+
+    active_streams += 1
+    try:
+        config = await asyncio.wait_for(
+            websocket.receive_json(),
+            timeout=STREAM_IDLE_TIMEOUT_SECONDS,
+        )
+        if not isinstance(config, dict):
+            raise ValueError("First message must be a JSON config object.")
+        sample_rate = int(config.get("sample_rate") or ANALYSIS_SAMPLE_RATE)
+        if not 8000 <= sample_rate <= 192000:
+            raise ValueError("Unsupported sample rate.")
+        sample_format = str(config.get("format") or "f32le").lower()
+        decode_pcm(b"", sample_format)
+
+        safe_title = _safe_text(config.get("title"))
+        safe_artist = _safe_text(config.get("artist"))
+        safe_style = _safe_text(config.get("style"), fallback="encouraging", max_length=30).lower()
+        fast_requested = _to_bool(config.get("fast_mode"), default=False)
+        use_llm = _to_bool(config.get("include_llm"), default=not fast_requested)
+        use_tts = _to_bool(config.get("include_tts"), default=not fast_requested)
+        if fast_requested:
+            use_llm = False
+            use_tts = False
+        send_interim = _to_bool(config.get("interim"), default=True)
+        normalize_peak = _to_bool(config.get("normalize_peak"), default=False)
+
+        reference, reference_warning = await _resolve_named_reference(
+            str(config.get("reference_url") or ""),
+            _normalize_sha256(str(config.get("reference_sha256") or "")),
+            fast_requested,
+        )
+        session = StreamingAnalysis(
+            sample_rate,
+            hop_length=analysis_hop_length(fast_requested),
+            max_seconds=MAX_AUDIO_SECONDS,
+            resample_quality=analysis_resample_quality(fast_requested),
+        )
+        await websocket.send_json(
+            {
+                "type": "ready",
+                "reference_used": reference is not None,
+                "reference_warning": reference_warning,
+            }
+        )
+
+        next_interim = STREAM_INTERIM_SECONDS
+        while True:
+            message = await asyncio.wait_for(
+                websocket.receive(),
+                timeout=STREAM_IDLE_TIMEOUT_SECONDS,
+            )
+            if message["type"] == "websocket.disconnect":
+                return
+            chunk = message.get("bytes")
+            if chunk:
+                await run_in_threadpool(session.feed, decode_pcm(chunk, sample_format))
+                if send_interim and session.duration >= next_interim:
+                    next_interim = session.duration + STREAM_INTERIM_SECONDS
+                    try:
+                        interim_stats = await run_in_threadpool(session.stats, reference)
+                    except Exception as exc:
+                        logger.debug("Interim stats skipped: %s", exc)
+                        continue
+                    await websocket.send_json(
+                        {
+                            "type": "interim",
+                            "seconds": round(session.duration, 2),
+                            "stats": interim_stats,
+                        }
+                    )
+                continue
+            text = message.get("text")
+            if text:
+                control = _stream_control(text)
+                if control is None:
+                    # A malformed control message is reported, not fatal to the take.
+                    await websocket.send_json(
+                        {"type": "error", "status": 400, "error": "Control messages must be JSON objects."}
+                    )
+                    continue
+                if control.get("type") == "end":
+                    break
+
+        await run_in_threadpool(session.finish, normalize_peak)
+        if session.sample_count == 0:
+            raise ValueError("Could not read User audio.")
+        try:
+            stats = await run_in_threadpool(session.stats, reference)
+        except Exception as exc:
+            if reference is None:
+                raise ValueError(str(exc).strip() or "Could not process streamed audio.") from exc
+            reference_warning = reference_warning or str(exc).strip() or "Reference comparison unavailable."
+            logger.warning("Reference comparison failed; retrying without reference: %s", reference_warning)
+            reference = None
+            stats = await run_in_threadpool(session.stats, None)
+
+        feedback_text, audio_b64 = await _compose_feedback(
+            stats,
+            safe_title,
+            safe_artist,
+            safe_style,
+            use_llm,
+            use_tts,
+        )
+        await websocket.send_json(
+            {
+                "type": "result",
+                "stats": stats,
+                "text": feedback_text,
+                "audio_base64": audio_b64,
+                "reference_used": reference is not None,
+                "reference_warning": reference_warning,
+            }
+        )
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    except asyncio.TimeoutError:
+        await _send_stream_error(websocket, 408, "Live judge stream went idle.", 1008)
+    except StreamLimitExceeded:
+        await _send_stream_error(
+            websocket,
+            413,
+            f"User audio exceeds {int(MAX_AUDIO_SECONDS)} seconds.",
+            1009,
+        )
+    except (ValueError, TypeError, KeyError) as exc:
+        await _send_stream_error(websocket, 400, str(exc).strip() or "Invalid stream message.", 1003)
+    finally:
+        active_streams -= 1
 
 
 if __name__ == "__main__":
@@ -0,0 +1,155 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelKey, List[int]] = {}
+        self._sums: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[index] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key in sorted(self._counts):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), self._counts[key]):
+                    cumulative += count
+                    labels = _format_labels(key, [("le", _format_value(bound))])
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(self._sums[key])}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+HTTP_REQUESTS = Counter("musify_http_requests_total", "HTTP requests by route and status.")
+HTTP_LATENCY = Histogram("musify_http_request_seconds", "HTTP request latency by route.")
+JUDGE_STAGE_LATENCY = Histogram("musify_judge_stage_seconds", "Time spent in each judge stage.")
+JUDGE_EVENTS = Counter(
+    "musify_judge_events_total",
+    "Judge fallbacks and failures: LLM/TTS timeouts and errors, reference warnings.",
+)
+
+
+def render_gauges(gauges: Dict[str, float]) -> List[str]:
+    # Point-in-time values read from the components' own snapshots.
+    lines = []
+    for name, value in sorted(gauges.items()):
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {_format_value(float(value))}")
+    return lines
+
+
+def render_counters(totals: Dict[str, float]) -> List[str]:
+    # Running totals the components keep themselves; exported as counters so
+    # rate() and increase() work across scrapes and restarts.
+    lines = []
+    for name, value in sorted(totals.items()):
+        counter = Counter(name, "Cumulative count since process start.")
+        counter.inc(float(value))
+        lines.extend(counter.render())
+    return lines
+
+
+def render_metrics(
+    gauges: Optional[Dict[str, float]] = None,
+    totals: Optional[Dict[str, float]] = None,
+) -> str:
+    lines: List[str] = []
+    for metric in (HTTP_REQUESTS, HTTP_LATENCY, JUDGE_STAGE_LATENCY, JUDGE_EVENTS):
+        lines.extend(metric.render())
+    lines.extend(render_counters(totals or {}))
+    lines.extend(render_gauges(gauges or {}))
+    return "\n".join(lines) + "\n"
+
+
+class StageTimer:
+    """Wall-clock time per named stage of one request.
+
+    A stage entered more than once accumulates. ``observe`` feeds the totals
+    to ``musify_judge_stage_seconds`` once per request; ``as_ms`` gives the
+    same numbers for the optional ``timings`` block of a response.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def observe(self):
+        for name, seconds in self.stages.items():
+            JUDGE_STAGE_LATENCY.observe(seconds, stage=name)
+
+    def as_ms(self) -> Dict[str, float]:
+        timings = {name: round(seconds * 1000.0, 2) for name, seconds in self.stages.items()}
+        timings["total"] = round((time.perf_counter() - self.started) * 1000.0, 2)
+        return timings
@@ -0,0 +1,252 @@
+"""Pre-rendered speech for template feedback.
+
+Every fixed fragment ``local_feedback_script`` can produce (openers, tips,
+closers, focus lines, score connectors and the numbers 0-100) is rendered
+once per voice into ``<root>/<voice>/<sha>.mp3``. A spoken response is the
+in-memory concatenation of those MP3 frames. While clips are missing, a
+response is synthesised in a single call and the missing clips are rendered
+in the background.
+
+Free-text fragments are never in the bank: the song line carries the title
+and artist, so each distinct one costs one TTS call even on a warm bank,
+after which it is served from a small in-memory LRU.
+
+Pre-rendering is a deploy step, run from backend/ai_engine:
+
+    python -m phrase_bank --voice en-US-GuyNeural
+
+Setting AI_PHRASE_BANK_PRERENDER=1 renders missing clips at API startup
+instead; it is off by default so a boot makes no TTS calls.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from llm_feedback import template_fragments
+from logging_setup import get_logger
+from tts import DEFAULT_VOICE, TTSBackend, get_tts_backend
+
+PHRASE_BANK_ENABLED = os.getenv("AI_PHRASE_BANK", "1").strip().lower() in {"1", "true", "yes", "on"}
+PHRASE_BANK_DIR = os.getenv("AI_PHRASE_BANK_DIR", "").strip()
+PHRASE_BANK_PRERENDER = os.getenv("AI_PHRASE_BANK_PRERENDER", "0").strip().lower() in {"1", "true", "yes", "on"}
+PHRASE_BANK_CONCURRENCY = max(1, int(os.getenv("AI_PHRASE_BANK_CONCURRENCY", "4")))
+PHRASE_BANK_DYNAMIC_ITEMS = max(0, int(os.getenv("AI_PHRASE_BANK_DYNAMIC_ITEMS", "256")))
+
+_VOICE_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]")
+
+logger = get_logger("phrase_bank")
+
+
+def _fragment_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class PhraseBank:
+    """Template fragments as MP3 clips on disk, assembled in memory."""
+
+    def __init__(
+        self,
+        root: Path,
+        backend: Optional[TTSBackend] = None,
+        voice: str = DEFAULT_VOICE,
+        max_dynamic_items: int = PHRASE_BANK_DYNAMIC_ITEMS,
+        concurrency: int = PHRASE_BANK_CONCURRENCY,
+    ):
+        self.voice = voice
+        self.root = Path(root) / _VOICE_UNSAFE.sub("_", voice)
+        self._backend = backend
+        self.max_dynamic_items = max_dynamic_items
+        self.concurrency = concurrency
+        self.templates = frozenset(template_fragments())
+        self._clips: Dict[str, bytes] = {}
+        self._dynamic: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._scheduled: Set[str] = set()
+        self._background: Set[asyncio.Task] = set()
+        self.assembled = 0
+        self.fallbacks = 0
+        self.rendered = 0
+        self.dynamic_hits = 0
+        self.dynamic_misses = 0
+
+    @property
+    def backend(self) -> TTSBackend:
+        return self._backend or get_tts_backend()
+
+    def path_for(self, text: str) -> Path:
+        return self.root / f"{_fragment_key(text)}.mp3"
+
+    def _read(self, text: str) -> Optional[bytes]:
+        with self._lock:
+            clip = self._clips.get(text)
+        if clip is not None:
+            return clip
+        try:
+            clip = self.path_for(text).read_bytes()
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._clips[text] = clip
+        return clip
+
+    def _write(self, text: str, clip: bytes):
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(text)
+        partial = path.with_name(f"{path.name}.{uuid.uuid4().hex}.part")
+        try:
+            partial.write_bytes(clip)
+            os.replace(partial, path)
+        finally:
+            partial.unlink(missing_ok=True)
+        with self._lock:
+            self._clips[text] = clip
+
+    async def _render(self, text: str) -> bytes:
+        clip = await self.backend.synthesize(text, self.voice)
+        if not clip:
+            raise ValueError(f"TTS returned no audio for {text!r}.")
+        self.rendered += 1
+        return clip
+
+    async def _dynamic_clip(self, text: str) -> bytes:
+        with self._lock:
+            clip = self._dynamic.get(text)
+            if clip is not None:
+                self._dynamic.move_to_end(text)
+                self.dynamic_hits += 1
+                return clip
+            self.dynamic_misses += 1
+        clip = await self._render(text)
+        with self._lock:
+            self._dynamic[text] = clip
+            while len(self._dynamic) > self.max_dynamic_items:
+                self._dynamic.popitem(last=False)
+        return clip
+
+    def _read_templates(self, fragments: List[str]) -> Dict[str, Optional[bytes]]:
+        return {fragment: self._read(fragment) for fragment in fragments if fragment in self.templates}
+
+    def missing(self) -> List[str]:
+        return [text for text in sorted(self.templates) if self._read(text) is None]
+
+    async def speak(self, fragments: List[str], text: str) -> bytes:
+        """MP3 for ``fragments`` in order, or for ``text`` when clips are missing.
+
+        A missing template clip means one ``synthesize(text)`` call now, with
+        the missing clips rendered in the background, rather than a round trip
+        per clip. A free-text fragment that cannot be rendered is left out
+        rather than failing the whole response.
+        """
+        templates = await asyncio.to_thread(self._read_templates, fragments)
+        missing = [fragment for fragment, clip in templates.items() if clip is None]
+        if missing:
+            self.fallbacks += 1
+            self._render_later(missing)
+            return await self.backend.synthesize(text, self.voice)
+
+        clips = []
+        for fragment in fragments:
+            if fragment in templates:
+                clips.append(templates[fragment])
+                continue
+            try:
+                clips.append(await self._dynamic_clip(fragment))
+            except Exception as exc:
+                logger.warning("Phrase bank skipped a free-text fragment: %s", exc)
+        self.assembled += 1
+        return b"".join(clips)
+
+    async def _render_all(self, texts: List[str]) -> int:
+        # Callers add ``texts`` to ``_scheduled`` first, so no clip is rendered twice at once.
+        semaphore = asyncio.Semaphore(self.concurrency)
+        failures = []
+
+        async def render(text: str):
+            async with semaphore:
+                try:
+                    clip = await self._render(text)
+                    await asyncio.to_thread(self._write, text, clip)
+                except Exception as exc:
+                    failures.append(exc)
+
+        try:
+            await asyncio.gather(*(render(text) for text in texts))
+        finally:
+            self._scheduled.difference_update(texts)
+        if failures:
+            logger.warning(
+                "Phrase bank rendered %d of %d clips for %s; first error: %s",
+                len(texts) - len(failures),
+                len(texts),
+                self.voice,
+                failures[0],
+            )
+        else:
+            logger.info("Phrase bank rendered %d clips for %s.", len(texts), self.voice)
+        return len(texts) - len(failures)
+
+    def _render_later(self, texts: List[str]):
+        texts = [text for text in texts if text not in self._scheduled]
+        if not texts:
+            return
+        self._scheduled.update(texts)
+        task = asyncio.create_task(self._render_all(texts))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def prerender(self) -> int:
+        missing = [text for text in await asyncio.to_thread(self.missing) if text not in self._scheduled]
+        if not missing:
+            return 0
+        self._scheduled.update(missing)
+        return await self._render_all(missing)
+
+    async def close(self):
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            loaded = len(self._clips)
+            dynamic = len(self._dynamic)
+        return {
+            "voice": self.voice,
+            "templates": len(self.templates),
+            "loaded": loaded,
+            "dynamic_items": dynamic,
+            "dynamic_hits": self.dynamic_hits,
+            "dynamic_misses": self.dynamic_misses,
+            "rendered": self.rendered,
+            "rendering": len(self._scheduled),
+            "assembled": self.assembled,
+            "fallbacks": self.fallbacks,
+        }
+
+
+def default_bank_dir() -> Path:
+    return Path(PHRASE_BANK_DIR) if PHRASE_BANK_DIR else Path(__file__).resolve().parent / "phrase_audio"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render the template feedback phrase bank.")
+    parser.add_argument("--voice", default=DEFAULT_VOICE)
+    parser.add_argument("--root", default=str(default_bank_dir()))
+    parser.add_argument("--backend", default=None, help="registered TTS backend name")
+    args = parser.parse_args()
+
+    bank = PhraseBank(Path(args.root), get_tts_backend(args.backend), args.voice)
+    rendered = asyncio.run(bank.prerender())
+    print(f"{len(bank.templates) - len(bank.missing())}/{len(bank.templates)} clips ready in {bank.root} ({rendered} new).")
+
+
+if __name__ == "__main__":
+    main()
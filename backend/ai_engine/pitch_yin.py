@@ -0,0 +1,117 @@
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+
+YIN_FMIN = 65.41  # C2
+YIN_FMAX = 1046.5  # C6
+YIN_THRESHOLD = 0.15
+YIN_SILENCE_RMS = 1e-3
+
+
+def _frame_length_for(sr: int, fmin: float) -> Tuple[int, int]:
+    tau_max = int(math.ceil(sr / fmin))
+    frame_length = 1 << int(math.ceil(math.log2(2 * tau_max)))
+    return frame_length, tau_max
+
+
+def yin_frame_length(sr: int, fmin: float = YIN_FMIN) -> int:
+    return _frame_length_for(sr, fmin)[0]
+
+
+def yin_pitch(
+    audio: np.ndarray,
+    sr: int,
+    hop_length: int,
+    fmin: float = YIN_FMIN,
+    fmax: float = YIN_FMAX,
+    threshold: float = YIN_THRESHOLD,
+    frame_length: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Frame-batched YIN. Returns per-frame f0 (NaN when unvoiced) and confidence.
+
+    Frames are centred like ``librosa.stft`` so frame ``i`` lines up with STFT
+    column ``i`` at the same hop length.
+    """
+    audio = np.asarray(audio, dtype=np.float32)
+    frame_length = int(frame_length or yin_frame_length(sr, fmin))
+    padded = np.pad(audio, frame_length // 2)
+    if padded.size < frame_length:
+        padded = np.pad(padded, (0, frame_length - padded.size))
+    # Strided view: no per-frame copies until the FFT.
+    frames = np.lib.stride_tricks.sliding_window_view(padded, frame_length)[::hop_length]
+    return yin_frames(frames, sr, fmin=fmin, fmax=fmax, threshold=threshold)
+
+
+def yin_frames(
+    frames: np.ndarray,
+    sr: int,
+    fmin: float = YIN_FMIN,
+    fmax: float = YIN_FMAX,
+    threshold: float = YIN_THRESHOLD,
+) -> Tuple[np.ndarray, np.ndarray]:
+    # ``frames`` is (n_frames, frame_length); each row is analysed independently.
+    n_frames, frame_length = frames.shape
+    _, tau_max = _frame_length_for(sr, fmin)
+    tau_max = min(tau_max, frame_length // 2)
+    tau_min = max(2, int(math.floor(sr / fmax)))
+    window = frame_length - tau_max
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+
+    # Cross-correlation r(tau) = sum_j x[j] x[j + tau] over the first `window` samples.
+    fft_size = 1 << int(math.ceil(math.log2(frame_length + window)))
+    spectrum = np.fft.rfft(frames, n=fft_size, axis=1)
+    head = np.fft.rfft(frames[:, :window], n=fft_size, axis=1)
+    corr = np.fft.irfft(spectrum * np.conj(head), n=fft_size, axis=1)[:, : tau_max + 1]
+
+    squared = np.square(frames, dtype=np.float64)
+    cumulative = np.concatenate(
+        [np.zeros((n_frames, 1)), np.cumsum(squared, axis=1)],
+        axis=1,
+    )
+    taus = np.arange(tau_max + 1)
+    energy_head = cumulative[:, window][:, None]
+    energy_lag = cumulative[:, taus + window] - cumulative[:, taus]
+    diff = np.maximum(energy_head + energy_lag - 2.0 * corr, 0.0)
+
+    # Cumulative mean normalised difference.
+    running = np.cumsum(diff[:, 1:], axis=1)
+    cmnd = np.ones_like(diff)
+    cmnd[:, 1:] = diff[:, 1:] * taus[1:] / np.maximum(running, 1e-12)
+
+    search = cmnd[:, tau_min : tau_max + 1]
+    if search.shape[1] < 3:
+        empty = np.full(n_frames, np.nan, dtype=np.float32)
+        return empty, np.zeros(n_frames, dtype=np.float32)
+
+    local_min = np.zeros_like(search, dtype=bool)
+    local_min[:, 1:-1] = (search[:, 1:-1] <= search[:, :-2]) & (search[:, 1:-1] <= search[:, 2:])
+    dips = local_min & (search < threshold)
+    has_dip = dips.any(axis=1)
+    best = np.where(has_dip, np.argmax(dips, axis=1), np.argmin(search, axis=1))
+
+    # Parabolic interpolation around the chosen lag.
+    rows = np.arange(n_frames)
+    centre = np.clip(best, 1, search.shape[1] - 2)
+    left = search[rows, centre - 1]
+    mid = search[rows, centre]
+    right = search[rows, centre + 1]
+    denom = left - 2.0 * mid + right
+    shift = np.divide(
+        0.5 * (left - right),
+        denom,
+        out=np.zeros_like(denom),
+        where=np.abs(denom) > 1e-12,
+    )
+    shift = np.where(best == centre, np.clip(shift, -1.0, 1.0), 0.0)
+    period = tau_min + best + shift
+
+    confidence = np.clip(1.0 - search[rows, best], 0.0, 1.0).astype(np.float32)
+    rms = np.sqrt(cumulative[:, frame_length] / frame_length)
+    voiced = has_dip & (rms > YIN_SILENCE_RMS)
+
+    f0 = np.full(n_frames, np.nan, dtype=np.float32)
+    f0[voiced] = (sr / period[voiced]).astype(np.float32)
+    confidence[~voiced] = 0.0
+    return f0, confidence
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Tuple
+
+PREFETCH_MAX_QUEUE = max(1, int(os.getenv("AI_PREFETCH_MAX_QUEUE", "32")))
+PREFETCH_STATUS_ITEMS = max(16, int(os.getenv("AI_PREFETCH_STATUS_ITEMS", "512")))
+PREFETCH_IDLE_POLL_SECONDS = 0.25
+
+# Resolver returns True when the reference ended up cached, False when unknown.
+Resolver = Callable[[str, str], Awaitable[bool]]
+
+
+class ReferencePrefetcher:
+    """Low-priority background warming of reference downloads and features.
+
+    Jobs run one at a time, and only while ``busy()`` reports that no judge
+    is waiting for the analysis stage, so prefetching never delays a score.
+    Each job's state is kept in a bounded map for the status endpoint; a
+    "ready" entry is dropped once ``cached`` no longer finds the features.
+    """
+
+    def __init__(
+        self,
+        resolve: Resolver,
+        busy: Callable[[], bool],
+        cached: Callable[[str], bool],
+        max_queue: int = PREFETCH_MAX_QUEUE,
+        max_status_items: int = PREFETCH_STATUS_ITEMS,
+    ):
+        self._resolve = resolve
+        self._busy = busy
+        self._cached = cached
+        self.max_queue = max_queue
+        self.max_status_items = max_status_items
+        self._queue: "asyncio.Queue[Tuple[str, str, str]]" = asyncio.Queue()
+        self._status: "OrderedDict[str, dict]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _set_status(self, key: str, state: str, error: str = "") -> dict:
+        status = {"id": key, "state": state, "updated_at": time.time()}
+        if error:
+            status["error"] = error
+        self._status[key] = status
+        self._status.move_to_end(key)
+        while len(self._status) > self.max_status_items:
+            self._status.popitem(last=False)
+        return status
+
+    def status(self, key: str) -> Optional[dict]:
+        current = self._status.get(key)
+        if current is not None and current["state"] == "ready" and not self._cached(key):
+            # Evicted since it was warmed.
+            del self._status[key]
+            return None
+        return current
+
+    def submit(self, key: str, kind: str, value: str) -> dict:
+        current = self.status(key)
+        if current is not None and current["state"] in {"queued", "running", "ready"}:
+            return current
+        if self._queue.qsize() >= self.max_queue:
+            self.rejected += 1
+            return {"id": key, "state": "rejected", "error": "Prefetch queue is full."}
+        self._queue.put_nowait((key, kind, value))
+        return self._set_status(key, "queued")
+
+    async def _worker(self):
+        while True:
+            key, kind, value = await self._queue.get()
+            try:
+                while self._busy():
+                    await asyncio.sleep(PREFETCH_IDLE_POLL_SECONDS)
+                self._set_status(key, "running")
+                cached = await self._resolve(kind, value)
+                self._set_status(key, "ready" if cached else "unknown")
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                detail = getattr(exc, "detail", "") or str(exc).strip() or "Prefetch failed."
+                self._set_status(key, "failed", str(detail))
+                self.failed += 1
+            finally:
+                self._queue.task_done()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._worker())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,234 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+REFERENCE_TIMEOUT_SECONDS = float(os.getenv("AI_REFERENCE_TIMEOUT_SECONDS", "15"))
+REFERENCE_MAX_AGE_SECONDS = max(0.0, float(os.getenv("AI_REFERENCE_MAX_AGE_SECONDS", str(7 * 24 * 3600))))
+REFERENCE_MAX_CONNECTIONS = max(1, int(os.getenv("AI_REFERENCE_MAX_CONNECTIONS", "8")))
+REFERENCE_USER_AGENT = "Musify-AI/1.0"
+
+
+class ReferenceDownloadError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def reference_cache_key(reference_url: str) -> str:
+    return hashlib.sha256(reference_url.strip().encode("utf-8")).hexdigest()
+
+
+def _write_atomic(path: Path, data: bytes):
+    partial = path.with_name(f"{path.name}.{uuid.uuid4().hex}.part")
+    try:
+        partial.write_bytes(data)
+        os.replace(partial, path)
+    finally:
+        try:
+            partial.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
+class ReferenceDownloader:
+    """Reference previews fetched over one pooled keep-alive client.
+
+    Concurrent fetches of the same URL share a single in-flight download.
+    Blobs older than ``max_age`` seconds are revalidated with the ETag and
+    Last-Modified saved in a ``.meta`` sidecar; a 304 only refreshes the
+    sidecar's mtime. A stale blob is served if revalidation fails.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_bytes: int,
+        timeout: float = REFERENCE_TIMEOUT_SECONDS,
+        max_age: float = REFERENCE_MAX_AGE_SECONDS,
+        max_connections: int = REFERENCE_MAX_CONNECTIONS,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self.timeout = float(timeout)
+        self.max_age = float(max_age)
+        self.max_connections = int(max_connections)
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.downloaded = 0
+        self.revalidated = 0
+        self.fresh_hits = 0
+        self.coalesced = 0
+        self.stale_served = 0
+
+    def path_for(self, reference_url: str) -> Path:
+        suffix = Path(urlparse(reference_url.strip()).path).suffix.lower()
+        if not suffix or len(suffix) > 10:
+            suffix = ".audio"
+        return self.cache_dir / f"{reference_cache_key(reference_url)}{suffix}"
+
+    @staticmethod
+    def meta_path(target: Path) -> Path:
+        return target.with_name(f"{target.name}.meta")
+
+    def _age(self, target: Path) -> Optional[float]:
+        # The sidecar's mtime is the last time the origin confirmed the blob.
+        for path in (self.meta_path(target), target):
+            try:
+                return max(0.0, time.time() - path.stat().st_mtime)
+            except OSError:
+                continue
+        return None
+
+    def is_fresh(self, reference_url: str) -> bool:
+        if self.max_age <= 0:
+            return True
+        age = self._age(self.path_for(reference_url))
+        return age is not None and age < self.max_age
+
+    def _client_for_loop(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                headers={"User-Agent": REFERENCE_USER_AGENT},
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                transport=self._transport,
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch(self, reference_url: str) -> Tuple[Path, bool]:
+        """Return the cached blob path and whether its bytes just changed."""
+        url = reference_url.strip()
+        key = reference_cache_key(url)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(url))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _done: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # Shielded: one caller giving up must not cancel the shared download.
+        return await asyncio.shield(task)
+
+    def _read_meta(self, target: Path) -> dict:
+        try:
+            with self.meta_path(target).open("r", encoding="utf-8") as meta_file:
+                meta = json.load(meta_file)
+            return meta if isinstance(meta, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    async def _fetch(self, url: str) -> Tuple[Path, bool]:
+        target = self.path_for(url)
+        cached = target.is_file() and target.stat().st_size > 0
+        if cached and self.is_fresh(url):
+            self.fresh_hits += 1
+            return target, False
+
+        headers = {}
+        if cached:
+            meta = self._read_meta(target)
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            body, response_headers = await self._download(url, headers)
+        except ReferenceDownloadError:
+            if not cached:
+                raise
+            self.stale_served += 1
+            return target, False
+
+        if body is None:
+            self.revalidated += 1
+            meta_path = self.meta_path(target)
+            if meta_path.exists():
+                os.utime(meta_path)
+            else:
+                await asyncio.to_thread(self._write_meta, target, url, response_headers)
+            return target, False
+
+        self.downloaded += 1
+        digest = hashlib.sha256(body).hexdigest()
+        # Origins without validators resend the same bytes; keep their features.
+        changed = not cached or self._read_meta(target).get("sha256") != digest
+        await asyncio.to_thread(self._store, target, url, body, response_headers, digest)
+        return target, changed
+
+    async def _download(self, url: str, headers: dict):
+        client = self._client_for_loop()
+        try:
+            async with client.stream("GET", url, headers=headers) as response:
+                if response.status_code == 304:
+                    return None, response.headers
+                response.raise_for_status()
+                declared = response.headers.get("content-length", "")
+                if declared.isdigit() and int(declared) > self.max_bytes:
+                    raise ReferenceDownloadError(
+                        413, f"Reference track exceeds {self.max_bytes} bytes."
+                    )
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body += chunk
+                    if len(body) > self.max_bytes:
+                        raise ReferenceDownloadError(
+                            413, f"Reference track exceeds {self.max_bytes} bytes."
+                        )
+        except ReferenceDownloadError:
+            raise
+        except Exception as exc:
+            reason = (str(exc).strip().splitlines() or [type(exc).__name__])[0]
+            raise ReferenceDownloadError(
+                502, f"Failed to download reference track: {reason}"
+            ) from exc
+
+        if not body:
+            raise ReferenceDownloadError(502, "Reference track is empty.")
+        return bytes(body), response.headers
+
+    def _write_meta(self, target: Path, url: str, headers, digest: str = ""):
+        meta = {
+            "url": url,
+            "etag": headers.get("etag", ""),
+            "last_modified": headers.get("last-modified", ""),
+            "sha256": digest or self._read_meta(target).get("sha256", ""),
+        }
+        _write_atomic(self.meta_path(target), json.dumps(meta).encode("utf-8"))
+
+    def _store(self, target: Path, url: str, body: bytes, headers, digest: str):
+        # Unique part names: no two writers ever share a partial file.
+        _write_atomic(target, body)
+        self._write_meta(target, url, headers, digest)
+
+    def snapshot(self) -> dict:
+        return {
+            "in_flight": len(self._in_flight),
+            "downloaded": self.downloaded,
+            "revalidated": self.revalidated,
+            "fresh_hits": self.fresh_hits,
+            "coalesced": self.coalesced,
+            "stale_served": self.stale_served,
+            "max_age_seconds": self.max_age,
+        }
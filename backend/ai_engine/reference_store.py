@@ -0,0 +1,139 @@
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from audio_analysis import (
+    AnalysisSession,
+    ClipFeatures,
+    DEFAULT_PITCH_HOP_LENGTH,
+    FAST_PITCH_HOP_LENGTH,
+    feature_cache_tag,
+)
+
+
+FEATURE_MEMORY_ITEMS = max(1, int(os.getenv("AI_REFERENCE_FEATURE_MEMORY_ITEMS", "128")))
+REFERENCE_HOP_LENGTHS = tuple(
+    sorted({DEFAULT_PITCH_HOP_LENGTH, FAST_PITCH_HOP_LENGTH})
+)
+
+
+def _to_float16(values: np.ndarray) -> np.ndarray:
+    finite = np.nan_to_num(np.asarray(values, dtype=np.float32))
+    limit = float(np.finfo(np.float16).max)
+    return np.clip(finite, -limit, limit).astype(np.float16)
+
+
+class ReferenceFeatureStore:
+    """Reference features keyed by cache key and hop length.
+
+    A bounded in-memory LRU sits in front of float16 ``.npz`` files, so a
+    popular reference is decoded and analysed once per feature signature.
+    """
+
+    def __init__(self, root: Path, max_items: int = FEATURE_MEMORY_ITEMS):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_items = max(1, int(max_items))
+        self._memory: "OrderedDict[Tuple[str, int], ClipFeatures]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def path_for(self, key: str, hop_length: int) -> Path:
+        return self.root / f"{key}.{feature_cache_tag(hop_length)}.npz"
+
+    def _remember(self, key: str, hop_length: int, features: ClipFeatures):
+        with self._lock:
+            self._memory[(key, hop_length)] = features
+            self._memory.move_to_end((key, hop_length))
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str, hop_length: int) -> Optional[ClipFeatures]:
+        with self._lock:
+            features = self._memory.get((key, hop_length))
+            if features is not None:
+                self._memory.move_to_end((key, hop_length))
+                return features
+
+        path = self.path_for(key, hop_length)
+        try:
+            with np.load(path) as data:
+                features = ClipFeatures(
+                    pitch=data["pitch"].astype(np.float32),
+                    onset_envelope=data["onset_envelope"].astype(np.float32),
+                    tempo=float(data["tempo"][0]),
+                )
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Truncated or stale file: drop it and recompute.
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                pass
+            return None
+
+        self._remember(key, hop_length, features)
+        return features
+
+    def put(self, key: str, hop_length: int, features: ClipFeatures):
+        self._remember(key, hop_length, features)
+        path = self.path_for(key, hop_length)
+        partial = path.with_name(f"{path.name}.{uuid.uuid4().hex}.part")
+        try:
+            with partial.open("wb") as out_file:
+                np.savez(
+                    out_file,
+                    pitch=_to_float16(features.pitch),
+                    onset_envelope=_to_float16(features.onset_envelope),
+                    tempo=np.array([features.tempo], dtype=np.float32),
+                )
+            os.replace(partial, path)
+        finally:
+            try:
+                partial.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    def contains(self, key: str, hop_length: Optional[int] = None) -> bool:
+        hops: Iterable[int] = (hop_length,) if hop_length else REFERENCE_HOP_LENGTHS
+        for hop in hops:
+            with self._lock:
+                if (key, hop) in self._memory:
+                    return True
+            if self.path_for(key, hop).exists():
+                return True
+        return False
+
+    def put_many(self, key: str, computed: Dict[int, ClipFeatures]):
+        for hop, features in computed.items():
+            self.put(key, hop, features)
+
+    def load(self, key: str, hop_length: int, audio_source) -> ClipFeatures:
+        features = self.get(key, hop_length)
+        if features is not None:
+            return features
+        computed = compute_reference_features(audio_source, hop_length)
+        self.put_many(key, computed)
+        return computed[hop_length]
+
+
+def compute_reference_features(
+    audio_source,
+    hop_length: Optional[int] = None,
+    max_seconds: Optional[float] = None,
+) -> Dict[int, ClipFeatures]:
+    # Decode once and derive features for every hop length we serve. Module
+    # level so it can run in an analysis worker process.
+    session = AnalysisSession.from_file(audio_source, max_seconds=max_seconds)
+    hops = set(REFERENCE_HOP_LENGTHS)
+    if hop_length:
+        hops.add(int(hop_length))
+    return {
+        hop: AnalysisSession(session.audio, session.sr, hop_length=hop).features()
+        for hop in sorted(hops)
+    }
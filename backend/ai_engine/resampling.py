@@ -0,0 +1,54 @@
+import os
+
+import numpy as np
+import soxr
+
+# Tier name -> soxr recipe. "high" is what librosa.resample(res_type="soxr_hq") ran.
+RESAMPLE_QUALITIES = {
+    "quick": "QQ",
+    "low": "LQ",
+    "medium": "MQ",
+    "high": "HQ",
+    "very_high": "VHQ",
+}
+
+
+def _quality_from_env(name: str, default: str) -> str:
+    value = os.getenv(name, default).strip().lower()
+    return value if value in RESAMPLE_QUALITIES else default
+
+
+RESAMPLE_QUALITY = _quality_from_env("AI_RESAMPLE_QUALITY", "high")
+FAST_RESAMPLE_QUALITY = _quality_from_env("AI_FAST_RESAMPLE_QUALITY", "low")
+
+
+def resample(
+    audio: np.ndarray,
+    orig_sr: int,
+    target_sr: int,
+    quality: str = RESAMPLE_QUALITY,
+) -> np.ndarray:
+    """Mono float32 resampling through soxr's polyphase engine.
+
+    Calls soxr directly rather than through ``librosa.resample``, which adds
+    a dtype round trip and a length fix-up on every clip.
+    """
+    if int(orig_sr) == int(target_sr):
+        return audio
+    audio = np.ascontiguousarray(audio, dtype=np.float32)
+    return soxr.resample(
+        audio,
+        int(orig_sr),
+        int(target_sr),
+        quality=RESAMPLE_QUALITIES.get(quality, RESAMPLE_QUALITIES[RESAMPLE_QUALITY]),
+    )
+
+
+def stream_resampler(orig_sr: int, target_sr: int, quality: str = RESAMPLE_QUALITY):
+    return soxr.ResampleStream(
+        int(orig_sr),
+        int(target_sr),
+        1,
+        dtype="float32",
+        quality=RESAMPLE_QUALITIES.get(quality, RESAMPLE_QUALITIES[RESAMPLE_QUALITY]),
+    )
@@ -0,0 +1,244 @@
+"""Offline re-scoring of recorded takes across all cores.
+
+Input is either a directory of takes scored against one ``--reference``,
+or a manifest (CSV with a header, or JSONL) with ``user`` and optional
+``reference`` and ``id`` fields. Relative manifest paths are resolved
+against the manifest's folder. Results stream to JSONL or CSV as they
+finish. Rerunning with the same output skips ids already scored, so an
+interrupted run resumes where it stopped; takes that errored are scored
+again and their new row is appended, so the last row for an id wins.
+
+Run from backend/ai_engine:
+
+    python -m score_batch takes/ --reference ref.m4a --output scores.jsonl
+    python -m score_batch --manifest pairs.csv --output scores.csv --workers 4
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+AUDIO_SUFFIXES = {".wav", ".flac", ".ogg", ".mp3", ".m4a", ".mp4", ".aac", ".webm", ".opus"}
+CSV_FIELDS = [
+    "id",
+    "user",
+    "reference",
+    "pitch_accuracy",
+    "timing_accuracy",
+    "stability_score",
+    "high_notes_issue",
+    "hop_length",
+    "elapsed_ms",
+    "error",
+]
+WORKER_REFERENCE_ITEMS = 32
+
+# Per-worker state, set by _worker_init in each process.
+_fast_mode = False
+_worker_references: "OrderedDict[Tuple[str, float], dict]" = OrderedDict()
+
+
+def _worker_init(fast_mode: bool):
+    global _fast_mode
+    _fast_mode = fast_mode
+
+
+def _reference_features(path: str):
+    # Each worker decodes a reference once and reuses it for every later take.
+    from reference_store import compute_reference_features
+
+    key = (path, os.path.getmtime(path))
+    features = _worker_references.get(key)
+    if features is None:
+        features = compute_reference_features(path)
+        _worker_references[key] = features
+        while len(_worker_references) > WORKER_REFERENCE_ITEMS:
+            _worker_references.popitem(last=False)
+    else:
+        _worker_references.move_to_end(key)
+    return features
+
+
+def _score(job: dict) -> dict:
+    from audio_analysis import analysis_hop_length, generate_stats
+
+    started = time.perf_counter()
+    hop_length = analysis_hop_length(_fast_mode)
+    row = {"id": job["id"], "user": job["user"], "reference": job["reference"], "hop_length": hop_length}
+    try:
+        reference = None
+        if job["reference"]:
+            reference = _reference_features(job["reference"])[hop_length]
+        row.update(generate_stats(job["user"], None, _fast_mode, reference))
+    except Exception as exc:
+        row["error"] = str(exc).strip() or type(exc).__name__
+    row["elapsed_ms"] = round((time.perf_counter() - started) * 1000.0, 1)
+    return row
+
+
+def _resolve(base: Path, value: str) -> str:
+    if not value:
+        return ""
+    path = Path(value).expanduser()
+    return str(path if path.is_absolute() else (base / path))
+
+
+def _manifest_jobs(manifest: Path) -> Iterator[dict]:
+    base = manifest.resolve().parent
+    with manifest.open("r", encoding="utf-8", newline="") as source:
+        if manifest.suffix.lower() in {".jsonl", ".ndjson"}:
+            records = (json.loads(line) for line in source if line.strip())
+        else:
+            records = csv.DictReader(source)
+        for record in records:
+            user = _resolve(base, (record.get("user") or "").strip())
+            if not user:
+                continue
+            yield {
+                "id": (record.get("id") or "").strip() or user,
+                "user": user,
+                "reference": _resolve(base, (record.get("reference") or "").strip()),
+            }
+
+
+def _directory_jobs(directory: Path, reference: str) -> Iterator[dict]:
+    for path in sorted(directory.rglob("*")):
+        if path.is_file() and path.suffix.lower() in AUDIO_SUFFIXES and str(path) != reference:
+            yield {"id": str(path.relative_to(directory)), "user": str(path), "reference": reference}
+
+
+def _drop_torn_tail(output: Path):
+    # An interrupted run can leave a half-written final row, in either format.
+    if not output.exists():
+        return
+    with output.open("rb+") as existing:
+        data = existing.read()
+        if data and not data.endswith(b"\n"):
+            existing.truncate(data.rfind(b"\n") + 1)
+
+
+def _completed_ids(output: Path, output_format: str) -> set:
+    if not output.exists():
+        return set()
+    done = set()
+    with output.open("r", encoding="utf-8", newline="") as existing:
+        if output_format == "csv":
+            rows = csv.DictReader(existing)
+        else:
+            rows = []
+            for line in existing:
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    continue
+        for row in rows:
+            # Errored takes are not done: a rerun tries them again.
+            if row.get("id") and not row.get("error"):
+                done.add(row["id"])
+    return done
+
+
+class _Writer:
+    def __init__(self, output: Path, output_format: str):
+        self.format = output_format
+        fresh = not output.exists() or output.stat().st_size == 0
+        self._file = output.open("a", encoding="utf-8", newline="")
+        self._csv = None
+        if output_format == "csv":
+            self._csv = csv.DictWriter(self._file, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            if fresh:
+                self._csv.writeheader()
+
+    def write(self, row: dict):
+        if self._csv is not None:
+            self._csv.writerow(row)
+        else:
+            self._file.write(json.dumps(row) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def _progress(done: int, total: int, failed: int, started: float):
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    rate = done / elapsed
+    remaining = (total - done) / rate if rate else 0.0
+    print(
+        f"\r[{done}/{total}] {rate:.2f} takes/s, {failed} failed, eta {remaining:.0f}s",
+        end="",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def run(jobs: List[dict], output: Path, output_format: str, workers: int, fast_mode: bool) -> Dict[str, int]:
+    _drop_torn_tail(output)
+    done_ids = _completed_ids(output, output_format)
+    pending = [job for job in jobs if job["id"] not in done_ids]
+    # Same-reference takes stay adjacent, so a chunk lands on a worker that has it.
+    pending.sort(key=lambda job: (job["reference"], job["user"]))
+    skipped = len(jobs) - len(pending)
+    if skipped:
+        print(f"Resuming: {skipped} takes already in {output}.", file=sys.stderr)
+
+    writer = _Writer(output, output_format)
+    failed = 0
+    started = time.perf_counter()
+    try:
+        if not pending:
+            return {"scored": 0, "failed": 0, "skipped": skipped}
+        chunksize = max(1, min(8, len(pending) // (workers * 4)))
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(workers, initializer=_worker_init, initargs=(fast_mode,)) as pool:
+            for done, row in enumerate(pool.imap_unordered(_score, pending, chunksize), start=1):
+                failed += 1 if row.get("error") else 0
+                writer.write(row)
+                _progress(done, len(pending), failed, started)
+        print(file=sys.stderr)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Scored {len(pending)} takes in {elapsed:.1f}s "
+        f"({len(pending) / max(elapsed, 1e-9):.2f} takes/s, {failed} failed).",
+        file=sys.stderr,
+    )
+    return {"scored": len(pending) - failed, "failed": failed, "skipped": skipped}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", nargs="?", help="folder of takes scored against --reference")
+    parser.add_argument("--manifest", help="CSV or JSONL with user, reference and id columns")
+    parser.add_argument("--reference", default="", help="reference clip for directory mode")
+    parser.add_argument("--output", required=True, help="results file (.jsonl or .csv)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default=None)
+    parser.add_argument("--workers", type=int, default=max(1, os.cpu_count() or 1))
+    parser.add_argument("--fast", action="store_true", help="score with the fast-mode hop length")
+    args = parser.parse_args(argv)
+
+    if bool(args.directory) == bool(args.manifest):
+        parser.error("give either a directory or --manifest")
+    if args.manifest:
+        jobs = list(_manifest_jobs(Path(args.manifest)))
+    else:
+        reference = str(Path(args.reference).resolve()) if args.reference else ""
+        jobs = list(_directory_jobs(Path(args.directory).resolve(), reference))
+
+    output = Path(args.output)
+    output_format = args.format or ("csv" if output.suffix.lower() == ".csv" else "jsonl")
+    summary = run(jobs, output, output_format, max(1, args.workers), args.fast)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+import asyncio
+import os
+import re
+import time
+from contextlib import aclosing
+from typing import AsyncIterator, Callable, List, NamedTuple, Optional
+
+SPEECH_PIPELINE_ENABLED = os.getenv("AI_SPEECH_PIPELINE", "1").strip().lower() in {"1", "true", "yes", "on"}
+# Shorter sentences are merged with the next one, so TTS is not called per "Great take."
+SPEECH_MIN_SENTENCE_CHARS = max(1, int(os.getenv("AI_SPEECH_MIN_SENTENCE_CHARS", "24")))
+
+_SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*\s+")
+
+Synthesizer = Callable[[str], AsyncIterator[bytes]]
+
+
+class SentenceSplitter:
+    """Turns a stream of text deltas into complete sentences."""
+
+    def __init__(self, min_chars: int = SPEECH_MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self._buffer = ""
+        self._pending = ""
+
+    def feed(self, delta: str) -> List[str]:
+        self._buffer += delta
+        sentences = []
+        while True:
+            match = _SENTENCE_END.search(self._buffer)
+            if match is None:
+                break
+            sentence = self._buffer[: match.end()].strip()
+            self._buffer = self._buffer[match.end():]
+            self._pending = f"{self._pending} {sentence}".strip()
+            if len(self._pending) >= self.min_chars:
+                sentences.append(self._pending)
+                self._pending = ""
+        return sentences
+
+    def flush(self) -> List[str]:
+        rest = f"{self._pending} {self._buffer}".strip()
+        self._buffer = ""
+        self._pending = ""
+        return [rest] if rest else []
+
+
+class SpokenFeedback(NamedTuple):
+    text: str
+    audio: bytes
+    llm_seconds: float
+    tts_seconds: float
+    first_audio_seconds: Optional[float]
+    tts_error: str
+
+
+async def speak_while_streaming(
+    deltas: AsyncIterator[str],
+    synthesize: Synthesizer,
+    llm_timeout: float,
+    tts_timeout: float,
+) -> SpokenFeedback:
+    """Synthesise LLM output sentence by sentence while it is still streaming.
+
+    The first sentence goes to TTS as soon as it is complete; later ones are
+    batched with whatever arrived during the previous synthesis, so there is
+    one TTS call per round rather than per sentence. Audio chunks are
+    concatenated (edge-tts emits MP3 frames). LLM errors and the LLM
+    timeout are raised, with TTS cancelled; a TTS failure drops the audio
+    but keeps the text.
+    """
+    started = time.perf_counter()
+    sentences: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+    splitter = SentenceSplitter()
+    text_parts: List[str] = []
+    audio_parts: List[bytes] = []
+    state = {"first_audio": None, "tts": 0.0, "error": ""}
+
+    async def produce():
+        async with aclosing(deltas) as stream:
+            async for delta in stream:
+                text_parts.append(delta)
+                for sentence in splitter.feed(delta):
+                    sentences.put_nowait(sentence)
+        for sentence in splitter.flush():
+            sentences.put_nowait(sentence)
+
+    async def collect(text: str):
+        async for chunk in synthesize(text):
+            if state["first_audio"] is None:
+                state["first_audio"] = time.perf_counter() - started
+            audio_parts.append(chunk)
+
+    async def speak():
+        finished = False
+        while not finished:
+            batch = [await sentences.get()]
+            while not sentences.empty():
+                batch.append(sentences.get_nowait())
+            if batch[-1] is None:
+                batch.pop()
+                finished = True
+            if not batch or state["error"]:
+                continue
+            tts_started = time.perf_counter()
+            try:
+                await asyncio.wait_for(collect(" ".join(batch)), timeout=tts_timeout)
+            except asyncio.TimeoutError:
+                state["error"] = "timeout"
+            except Exception:
+                state["error"] = "error"
+            state["tts"] += time.perf_counter() - tts_started
+
+    speaker = asyncio.create_task(speak())
+    try:
+        await asyncio.wait_for(produce(), timeout=llm_timeout)
+        llm_seconds = time.perf_counter() - started
+        sentences.put_nowait(None)
+        await speaker
+    except BaseException:
+        speaker.cancel()
+        try:
+            await speaker
+        except asyncio.CancelledError:
+            pass
+        raise
+
+    return SpokenFeedback(
+        text="".join(text_parts).strip(),
+        audio=b"" if state["error"] else b"".join(audio_parts),
+        llm_seconds=llm_seconds,
+        tts_seconds=state["tts"],
+        first_audio_seconds=state["first_audio"],
+        tts_error=state["error"],
+    )
@@ -0,0 +1,209 @@
+from typing import List, Optional
+
+import librosa
+import numpy as np
+from scipy.signal import get_window
+
+from audio_analysis import (
+    ANALYSIS_N_FFT,
+    ANALYSIS_SAMPLE_RATE,
+    DEFAULT_PITCH_HOP_LENGTH,
+    PITCH_BACKEND,
+    AnalysisSession,
+    stats_from_features,
+)
+from pitch_yin import yin_frame_length, yin_frames
+from resampling import RESAMPLE_QUALITY, stream_resampler
+
+
+# Matches the browser's normalizePeak, which uploaded takes already went through.
+PEAK_TARGET = 0.92
+
+
+class StreamLimitExceeded(ValueError):
+    pass
+
+
+def peak_gain(samples: np.ndarray, target: float = PEAK_TARGET) -> float:
+    peak = float(np.max(np.abs(samples))) if samples.size else 0.0
+    if peak < 1e-5:
+        return 1.0
+    gain = target / peak
+    return 1.0 if 0.99 <= gain <= 1.01 else gain
+
+
+class StreamingAnalysis:
+    """Incremental counterpart of ``AnalysisSession`` for PCM arriving in chunks.
+
+    STFT columns (centred, zero padded, like ``librosa.stft``) are computed as
+    soon as their window is complete, and per-frame pitch and mel power are
+    kept per column. Only the cheap whole-clip steps (log-mel normalisation,
+    onset strength, tempo) run at read time, so ``stats`` is ready right after
+    the last chunk. pYIN has no incremental form: interim pitch uses piptrack
+    and ``finish`` re-runs pYIN over the whole take.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        hop_length: int = DEFAULT_PITCH_HOP_LENGTH,
+        n_fft: int = ANALYSIS_N_FFT,
+        pitch_backend: str = PITCH_BACKEND,
+        target_sr: int = ANALYSIS_SAMPLE_RATE,
+        max_seconds: Optional[float] = None,
+        resample_quality: str = RESAMPLE_QUALITY,
+    ):
+        self.sr = int(target_sr)
+        self.hop_length = int(hop_length)
+        self.n_fft = int(n_fft)
+        self.pitch_backend = pitch_backend
+        self.max_seconds = max_seconds
+        self.finished = False
+
+        self._resampler = None
+        if int(sample_rate) != self.sr:
+            self._resampler = stream_resampler(sample_rate, self.sr, resample_quality)
+
+        self._lead = self.n_fft // 2
+        self._buffer = np.zeros(max(self.n_fft * 4, self.sr * 8), dtype=np.float32)
+        self._size = self._lead
+        self._frames_done = 0
+        self._window = get_window("hann", self.n_fft, fftbins=True).astype(np.float32)
+        self._mel_basis = librosa.filters.mel(sr=self.sr, n_fft=self.n_fft)
+        self._yin_length = yin_frame_length(self.sr)
+        self._pitch_columns: List[np.ndarray] = []
+        self._mel_columns: List[np.ndarray] = []
+        self._features = None
+
+    @property
+    def sample_count(self) -> int:
+        return self._size - self._lead - (self._lead if self.finished else 0)
+
+    @property
+    def duration(self) -> float:
+        return self.sample_count / float(self.sr)
+
+    @property
+    def audio(self) -> np.ndarray:
+        return self._buffer[self._lead : self._lead + self.sample_count]
+
+    def _append(self, samples: np.ndarray):
+        needed = self._size + samples.size
+        if needed > self._buffer.size:
+            grown = np.zeros(max(needed, self._buffer.size * 2), dtype=np.float32)
+            grown[: self._size] = self._buffer[: self._size]
+            self._buffer = grown
+        self._buffer[self._size : needed] = samples
+        self._size = needed
+
+    def feed(self, samples: np.ndarray):
+        if self.finished:
+            raise RuntimeError("Stream already finished.")
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        if self._resampler is not None:
+            samples = self._resampler.resample_chunk(samples)
+        self._append(samples)
+        if self.max_seconds and self.duration > self.max_seconds:
+            raise StreamLimitExceeded(f"Audio exceeds {int(self.max_seconds)} seconds.")
+        self._process_ready_frames()
+
+    def finish(self, normalize_peak: bool = False) -> "StreamingAnalysis":
+        if self.finished:
+            return self
+        if self._resampler is not None:
+            self._append(self._resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True))
+        # Trailing zero pad, so the last columns match a centred full-clip STFT.
+        self._append(np.zeros(self._lead, dtype=np.float32))
+        self.finished = True
+        self._process_ready_frames()
+
+        gain = peak_gain(self.audio) if normalize_peak else 1.0
+        if gain != 1.0:
+            # Mel power scales with the square of the gain; YIN's silence gate does not.
+            audio = self.audio
+            audio *= gain
+            self._mel_columns = [columns * gain**2 for columns in self._mel_columns]
+
+        if self.pitch_backend == "pyin" or (
+            self.pitch_backend == "yin" and (self._yin_length > self.n_fft or gain != 1.0)
+        ):
+            session = AnalysisSession(
+                self.audio, self.sr, self.hop_length, self.n_fft, self.pitch_backend
+            )
+            self._pitch_columns = [session.pitch_contour]
+        self._features = None
+        return self
+
+    def _process_ready_frames(self):
+        ready = (self._size - self.n_fft) // self.hop_length + 1
+        if self.finished:
+            # A centred STFT has exactly 1 + len // hop columns.
+            ready = min(ready, 1 + self.sample_count // self.hop_length)
+        if ready <= self._frames_done:
+            return
+
+        start = self._frames_done * self.hop_length
+        stop = (ready - 1) * self.hop_length + self.n_fft
+        frames = np.lib.stride_tricks.sliding_window_view(
+            self._buffer[start:stop], self.n_fft
+        )[:: self.hop_length]
+        spectrogram = np.abs(np.fft.rfft(frames * self._window, axis=1)).T
+
+        if self.pitch_backend == "yin" and self._yin_length <= self.n_fft:
+            # The centred YIN frame sits in the middle of the STFT window.
+            offset = self._lead - self._yin_length // 2
+            f0, _ = yin_frames(frames[:, offset : offset + self._yin_length], self.sr)
+            contour = np.nan_to_num(f0, nan=0.0)
+        else:
+            pitches, magnitudes = librosa.piptrack(
+                S=spectrogram,
+                sr=self.sr,
+                n_fft=self.n_fft,
+                hop_length=self.hop_length,
+            )
+            columns = np.arange(pitches.shape[1])
+            contour = pitches[np.argmax(magnitudes, axis=0), columns]
+
+        self._pitch_columns.append(contour.astype(np.float32, copy=False))
+        self._mel_columns.append(self._mel_basis @ (spectrogram**2))
+        self._frames_done = ready
+        self._features = None
+
+    def _session(self) -> AnalysisSession:
+        # Whole-clip steps run on the accumulated columns, via the same code path.
+        if self._features is None:
+            session = AnalysisSession(
+                self.audio, self.sr, self.hop_length, self.n_fft, self.pitch_backend
+            )
+            session.pitch_contour = (
+                np.concatenate(self._pitch_columns)
+                if self._pitch_columns
+                else np.zeros(0, dtype=np.float32)
+            )
+            if self._mel_columns:
+                mel = np.concatenate(self._mel_columns, axis=1)
+                session.onset_envelope = librosa.onset.onset_strength(
+                    S=librosa.power_to_db(mel),
+                    sr=self.sr,
+                    n_fft=self.n_fft,
+                    hop_length=self.hop_length,
+                ).astype(np.float32, copy=False)
+            else:
+                session.onset_envelope = np.zeros(0, dtype=np.float32)
+            self._features = session
+        return self._features
+
+    @property
+    def pitch(self) -> np.ndarray:
+        return self._session().pitch
+
+    @property
+    def onset_envelope(self) -> np.ndarray:
+        return self._session().onset_envelope
+
+    @property
+    def tempo(self) -> float:
+        return self._session().tempo
+
+    def stats(self, reference=None) -> dict:
+        return stats_from_features(self._session(), reference)
@@ -1,20 +1,84 @@
 import os
+from abc import ABC, abstractmethod
 from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, Optional
 
 import edge_tts
 
 DEFAULT_VOICE = os.getenv("EDGE_TTS_VOICE", "en-US-GuyNeural")
 DEFAULT_RATE = os.getenv("EDGE_TTS_RATE", "+0%")
+TTS_BACKEND = os.getenv("AI_TTS_BACKEND", "edge").strip().lower()
+
+
+class TTSBackend(ABC):
+    """Speech synthesis behind ``generate_voice`` and ``stream_voice``.
+
+    Subclasses implement ``stream``; MP3 chunks it yields must concatenate
+    into a playable file. Register new ones with ``register_tts_backend``.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def stream(self, text: str, voice: str = DEFAULT_VOICE) -> AsyncIterator[bytes]:
+        ...
+
+    async def synthesize(self, text: str, voice: str = DEFAULT_VOICE) -> bytes:
+        return b"".join([chunk async for chunk in self.stream(text, voice)])
+
+
+class EdgeTTSBackend(TTSBackend):
+    name = "edge"
+
+    def __init__(self, rate: str = DEFAULT_RATE):
+        self.rate = rate
+
+    async def stream(self, text: str, voice: str = DEFAULT_VOICE) -> AsyncIterator[bytes]:
+        communicate = edge_tts.Communicate(text=text, voice=voice, rate=self.rate)
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio" and chunk["data"]:
+                yield chunk["data"]
+
+
+_BACKEND_FACTORIES: Dict[str, Callable[[], TTSBackend]] = {"edge": EdgeTTSBackend}
+_backends: Dict[str, TTSBackend] = {}
+
+
+def register_tts_backend(name: str, factory: Callable[[], TTSBackend]):
+    _BACKEND_FACTORIES[name] = factory
+    _backends.pop(name, None)
+
+
+def get_tts_backend(name: Optional[str] = None) -> TTSBackend:
+    name = name or TTS_BACKEND
+    backend = _backends.get(name)
+    if backend is None:
+        factory = _BACKEND_FACTORIES.get(name)
+        if factory is None:
+            raise ValueError(f"Unknown TTS backend: {name}")
+        backend = _backends[name] = factory()
+    return backend
 
 
 async def generate_voice(
     text: str,
     output_file: str = "feedback.mp3",
     voice: str = DEFAULT_VOICE,
+    backend: Optional[TTSBackend] = None,
 ):
     output_path = Path(output_file)
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    communicate = edge_tts.Communicate(text=text, voice=voice, rate=DEFAULT_RATE)
-    await communicate.save(str(output_path))
+    audio = await (backend or get_tts_backend()).synthesize(text, voice)
+    output_path.write_bytes(audio)
     return str(output_path)
+
+
+async def stream_voice(
+    text: str,
+    voice: str = DEFAULT_VOICE,
+    backend: Optional[TTSBackend] = None,
+) -> AsyncIterator[bytes]:
+    # MP3 chunks as the backend produces them; concatenated they form one file.
+    async for chunk in (backend or get_tts_backend()).stream(text, voice):
+        yield chunk
@@ -1,5 +1,7 @@
 const http = require("http");
 const https = require("https");
+const net = require("net");
+const tls = require("tls");
 const fs = require("fs");
 const fsp = fs.promises;
 const path = require("path");
@@ -1031,6 +1033,47 @@ const server = http.createServer(async (req, res) => {
   await handleStatic(reqUrl, res);
 });
 
+function proxyAiUpgrade(req, socket, head) {
+  // WebSocket routes (e.g. /api/ai/judge/stream) are tunnelled byte for byte.
+  const reqUrl = new URL(req.url, `http://${req.headers.host}`);
+  if (!reqUrl.pathname.startsWith("/api/ai/")) {
+    socket.destroy();
+    return;
+  }
+
+  const target = new URL(AI_ENGINE_URL);
+  const secure = target.protocol === "https:";
+  const port = Number(target.port) || (secure ? 443 : 80);
+  const basePath = target.pathname.replace(/\/$/, "");
+  const targetPath = `${basePath}${reqUrl.pathname.replace(/^\/api\/ai/, "")}${reqUrl.search}`;
+  console.log(`[Proxy] UPGRADE ${reqUrl.pathname} -> ${target.origin}${targetPath}`);
+
+  const upstream = secure
+    ? tls.connect({ host: target.hostname, port, servername: target.hostname })
+    : net.connect({ host: target.hostname, port });
+  const onConnect = () => {
+    const headers = { ...req.headers, host: target.host };
+    let preamble = `${req.method} ${targetPath} HTTP/1.1\r\n`;
+    for (const [key, value] of Object.entries(headers)) {
+      for (const item of Array.isArray(value) ? value : [value]) {
+        preamble += `${key}: ${item}\r\n`;
+      }
+    }
+    upstream.write(`${preamble}\r\n`);
+    if (head && head.length) upstream.write(head);
+    upstream.pipe(socket);
+    socket.pipe(upstream);
+  };
+  upstream.once(secure ? "secureConnect" : "connect", onConnect);
+  upstream.on("error", (error) => {
+    console.error("[Proxy Upgrade Error]", error);
+    socket.destroy();
+  });
+  socket.on("error", () => upstream.destroy());
+}
+
+server.on("upgrade", proxyAiUpgrade);
+
 server.listen(PORT, () => {
   console.log(`Musify server running on http://localhost:${PORT}`);
 });
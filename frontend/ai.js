@@ -3,13 +3,15 @@ import {
   setStatus,
   createSongCard,
   apiFetch,
-} from "./common.js?v=20260218m7";
+  apiSocketUrl,
+} from "./common.js?v=20260218m8";
 
 let audioChunks = [];
 let isRecording = false;
 let selectedTrack = null;
 let cachedReferencePreviewUrl = "";
 let cachedReferenceWavBlob = null;
+let cachedReferenceSha256 = "";
 let appInstance = null;
 const LYRICS_CACHE_TTL_MS = 6 * 60 * 60 * 1000;
 const LYRICS_NEGATIVE_CACHE_TTL_MS = 90 * 1000;
@@ -25,6 +27,8 @@ let lyricsStorageLoaded = false;
 const JUDGE_TARGET_SR = 16000;
 const JUDGE_MAX_SECONDS = 24;
 const JUDGE_SILENCE_THRESHOLD = 0.007;
+const LIVE_JUDGE_CONNECT_TIMEOUT_MS = 4000;
+const LIVE_JUDGE_RESULT_TIMEOUT_MS = 8000;
 
 const refs = {};
 
@@ -575,6 +579,7 @@ async function selectTrack(track) {
   selectedTrack = track;
   cachedReferencePreviewUrl = "";
   cachedReferenceWavBlob = null;
+  cachedReferenceSha256 = "";
   refs.selectedImg.src = track.image || "./music logo.png";
   if (refs.boothBgArt) refs.boothBgArt.src = track.image || "./music logo.png";
   refs.selectedTitle.textContent = track.title;
@@ -604,8 +609,24 @@ async function selectTrack(track) {
     appInstance.setTrack(playableTrack, { autoplay: false });
   }
 
-  // Warm reference processing now so judge starts faster later.
-  void getReferenceWavBlob(playableTrack).catch(() => {});
+  // Warm reference processing now so judge starts faster later; the hash is
+  // what the live judge sends.
+  void getReferenceWavBlob(playableTrack)
+    .then((blob) => (blob ? getReferenceSha256(blob) : ""))
+    .catch(() => {});
+  prefetchReferenceOnServer(playableTrack);
+}
+
+function prefetchReferenceOnServer(track) {
+  // Server-side download and feature extraction overlap with the take.
+  const previewUrl = (track?.previewUrl || "").trim();
+  if (!previewUrl) return;
+  void apiFetch("/api/ai/references/prefetch", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ urls: [previewUrl] }),
+    timeout: 4000,
+  }).catch(() => {});
 }
 
 function clearSelection() {
@@ -614,6 +635,7 @@ function clearSelection() {
   selectedTrack = null;
   cachedReferencePreviewUrl = "";
   cachedReferenceWavBlob = null;
+  cachedReferenceSha256 = "";
   refs.selectedDisplay?.classList.add("hidden-el");
   refs.grid?.classList.remove("hidden-el");
   if (refs.searchForm?.parentElement) {
@@ -642,6 +664,7 @@ let recorderNode;
 let recordingData = [];
 let recordingLength = 0;
 let sampleRate = 44100;
+let liveJudge = null;
 
 function trimSilence(samples, sr) {
   if (!samples?.length) return new Float32Array();
@@ -725,14 +748,191 @@ function setupScriptProcessorFallback(source) {
   processor.onaudioprocess = (e) => {
     if (!isRecording) return;
     const channelData = e.inputBuffer.getChannelData(0);
-    recordingData.push(new Float32Array(channelData));
-    recordingLength += channelData.length;
+    const chunk = new Float32Array(channelData);
+    recordingData.push(chunk);
+    recordingLength += chunk.length;
+    sendLiveChunk(chunk);
   };
 
   source.connect(processor);
   processor.connect(audioContext.destination);
 }
 
+function openLiveJudge(sr) {
+  // Streams PCM to the judge while recording so the score is ready on stop.
+  if (typeof WebSocket === "undefined") return null;
+
+  let socket;
+  try {
+    socket = new WebSocket(apiSocketUrl("/api/ai/judge/stream"));
+  } catch (error) {
+    console.warn("Live judge unavailable; will upload after recording.", error);
+    return null;
+  }
+  socket.binaryType = "arraybuffer";
+
+  const session = {
+    socket,
+    failed: false,
+    sentSamples: 0,
+    maxSamples: Math.round(JUDGE_MAX_SECONDS * sr),
+    silencePad: Math.floor(sr * 0.08),
+    voiced: false,
+    held: [],
+    heldLength: 0,
+    pending: [],
+    result: null,
+    waiters: [],
+  };
+
+  const settle = () => {
+    const waiters = session.waiters.splice(0);
+    waiters.forEach((resolve) => resolve(session.result));
+  };
+  const fail = () => {
+    session.failed = true;
+    session.pending = [];
+    settle();
+  };
+  const connectTimer = window.setTimeout(() => {
+    if (socket.readyState !== WebSocket.OPEN) {
+      fail();
+      socket.close();
+    }
+  }, LIVE_JUDGE_CONNECT_TIMEOUT_MS);
+
+  socket.onopen = () => {
+    window.clearTimeout(connectTimer);
+    socket.send(
+      JSON.stringify({
+        sample_rate: sr,
+        format: "f32le",
+        // Only the hash of the decoded reference WAV, so the live score compares
+        // against the same audio an upload would; an unknown hash falls back to upload.
+        reference_sha256: cachedReferenceSha256,
+        title: selectedTrack?.title || "Unknown",
+        artist: selectedTrack?.artist || "Unknown",
+        fast_mode: 1,
+        include_llm: 0,
+        include_tts: 0,
+        interim: 1,
+        normalize_peak: 1,
+      }),
+    );
+    session.pending.forEach((chunk) => socket.send(chunk));
+    session.pending = [];
+  };
+  socket.onmessage = (event) => {
+    let message;
+    try {
+      message = JSON.parse(event.data);
+    } catch {
+      return;
+    }
+    if (message.type === "interim" && isRecording && message.stats) {
+      refs.status.textContent = `Listening... pitch ${Math.round(message.stats.pitch_accuracy)}%, timing ${Math.round(message.stats.timing_accuracy)}%`;
+    } else if (message.type === "result") {
+      session.result = message;
+      settle();
+    } else if (message.type === "error") {
+      console.warn("Live judge error:", message.error);
+      fail();
+    }
+  };
+  socket.onerror = () => fail();
+  socket.onclose = () => {
+    window.clearTimeout(connectTimer);
+    if (!session.result) fail();
+  };
+  return session;
+}
+
+function trimLiveChunk(session, chunk) {
+  // trimSilence for a take still being recorded: silence before the first loud
+  // sample and after the latest one is held back until more voice arrives.
+  let first = -1;
+  let last = -1;
+  for (let i = 0; i < chunk.length; i += 1) {
+    if (Math.abs(chunk[i]) >= JUDGE_SILENCE_THRESHOLD) {
+      if (first < 0) first = i;
+      last = i;
+    }
+  }
+  session.held.push(chunk);
+  session.heldLength += chunk.length;
+  if (last < 0) {
+    // Before the first loud sample only the pre-roll pad is worth keeping.
+    while (
+      !session.voiced &&
+      session.heldLength - session.held[0].length >= session.silencePad
+    ) {
+      session.heldLength -= session.held.shift().length;
+    }
+    return null;
+  }
+  const held = mergeBuffers(session.held, session.heldLength);
+  const chunkStart = held.length - chunk.length;
+  const start = session.voiced
+    ? 0
+    : Math.max(0, chunkStart + first - session.silencePad);
+  const end = chunkStart + last + 1;
+  session.voiced = true;
+  session.held = [held.slice(end)];
+  session.heldLength = held.length - end;
+  return held.subarray(start, end);
+}
+
+function sendLiveChunk(chunk) {
+  const session = liveJudge;
+  if (!session || session.failed) return;
+  const samples = trimLiveChunk(session, chunk);
+  if (samples?.length) sendLiveSamples(session, samples);
+}
+
+function sendLiveSamples(session, chunk) {
+  if (session.sentSamples >= session.maxSamples) return;
+  const room = session.maxSamples - session.sentSamples;
+  const samples = chunk.length > room ? chunk.slice(0, room) : chunk;
+  session.sentSamples += samples.length;
+  const bytes = samples.buffer.slice(
+    samples.byteOffset,
+    samples.byteOffset + samples.byteLength,
+  );
+  if (session.socket.readyState === WebSocket.OPEN) {
+    session.socket.send(bytes);
+  } else {
+    session.pending.push(bytes);
+  }
+}
+
+function finishLiveJudge() {
+  const session = liveJudge;
+  liveJudge = null;
+  if (!session || session.failed) return Promise.resolve(null);
+  if (session.voiced && session.heldLength) {
+    const tail = mergeBuffers(session.held, session.heldLength);
+    // trimSilence keeps the pad up to, not including, end + pad.
+    sendLiveSamples(session, tail.subarray(0, Math.max(0, session.silencePad - 1)));
+  }
+
+  return new Promise((resolve) => {
+    const timer = window.setTimeout(() => {
+      session.failed = true;
+      session.socket.close();
+      resolve(null);
+    }, LIVE_JUDGE_RESULT_TIMEOUT_MS);
+    session.waiters.push((result) => {
+      window.clearTimeout(timer);
+      resolve(session.failed ? null : result);
+    });
+    if (session.socket.readyState === WebSocket.OPEN) {
+      session.socket.send(JSON.stringify({ type: "end" }));
+    } else {
+      session.pending.push(JSON.stringify({ type: "end" }));
+    }
+  });
+}
+
 async function startRecording() {
   try {
     mediaStream = await navigator.mediaDevices.getUserMedia({ audio: true });
@@ -746,6 +946,7 @@ async function startRecording() {
 
     recordingData = [];
     recordingLength = 0;
+    liveJudge = openLiveJudge(sampleRate);
 
     if (audioContext.audioWorklet && typeof AudioWorkletNode !== "undefined") {
       try {
@@ -766,8 +967,10 @@ async function startRecording() {
           if (!isRecording) return;
           const chunk = event.data;
           if (!chunk || !chunk.length) return;
-          recordingData.push(new Float32Array(chunk));
-          recordingLength += chunk.length;
+          const samples = new Float32Array(chunk);
+          recordingData.push(samples);
+          recordingLength += samples.length;
+          sendLiveChunk(samples);
         };
         sourceNode.connect(recorderNode);
         recorderNode.connect(audioContext.destination);
@@ -825,14 +1028,22 @@ function stopRecording() {
   }
 }
 
-function processWavRecording() {
+async function processWavRecording() {
+  const liveResult = finishLiveJudge();
   // Flatten buffer
   const buffer = mergeBuffers(recordingData, recordingLength);
   const prepared = prepareAudioForJudge(buffer, sampleRate);
   // Encode WAV
   const wavBlob = encodeWAV(prepared.samples, prepared.sampleRate);
 
-  uploadAudio(wavBlob);
+  const result = await liveResult;
+  // A live score without the reference would differ from the upload path.
+  const referenceMissed = Boolean(selectedTrack?.previewUrl) && !result?.reference_used;
+  if (result?.stats && !referenceMissed) {
+    displayResults(result, wavBlob);
+    return;
+  }
+  uploadAudio(wavBlob, prepared);
 }
 
 function mergeBuffers(channelBuffer, recordingLength) {
@@ -889,6 +1100,13 @@ function floatTo16BitPCM(output, offset, input) {
   }
 }
 
+function encodePCM16(samples) {
+  // Raw little-endian s16 mono: no container for the server to parse.
+  const view = new DataView(new ArrayBuffer(samples.length * 2));
+  floatTo16BitPCM(view, 0, samples);
+  return new Blob([view], { type: "application/octet-stream" });
+}
+
 function writeString(view, offset, string) {
   for (let i = 0; i < string.length; i++) {
     view.setUint8(offset + i, string.charCodeAt(i));
@@ -939,6 +1157,7 @@ async function getReferenceWavBlob(track) {
 
     cachedReferencePreviewUrl = previewUrl;
     cachedReferenceWavBlob = wavBlob;
+    cachedReferenceSha256 = "";
     return wavBlob;
   } catch (error) {
     console.warn("Could not prepare reference preview as WAV.", error);
@@ -950,9 +1169,54 @@ async function getReferenceWavBlob(track) {
   }
 }
 
-async function buildJudgeFormData(audioBlob, includeReference = true) {
+async function getReferenceSha256(referenceBlob) {
+  if (cachedReferenceSha256 && referenceBlob === cachedReferenceWavBlob) {
+    return cachedReferenceSha256;
+  }
+  if (!window.crypto?.subtle) return "";
+
+  try {
+    const digest = await window.crypto.subtle.digest(
+      "SHA-256",
+      await referenceBlob.arrayBuffer(),
+    );
+    const hex = Array.from(new Uint8Array(digest), (byte) =>
+      byte.toString(16).padStart(2, "0"),
+    ).join("");
+    if (referenceBlob === cachedReferenceWavBlob) {
+      cachedReferenceSha256 = hex;
+    }
+    return hex;
+  } catch (error) {
+    console.warn("Could not hash reference preview.", error);
+    return "";
+  }
+}
+
+async function isReferenceKnown(referenceSha256) {
+  try {
+    const data = await apiFetch(`/api/ai/references/${referenceSha256}`, {
+      timeout: 4000,
+    });
+    return Boolean(data?.known);
+  } catch {
+    return false;
+  }
+}
+
+async function buildJudgeFormData(
+  audioBlob,
+  includeReference = true,
+  prepared = null,
+) {
   const formData = new FormData();
-  formData.append("file", audioBlob, "user.wav");
+  if (prepared?.samples?.length) {
+    formData.append("file", encodePCM16(prepared.samples), "user.pcm");
+    formData.append("audio_format", "s16le");
+    formData.append("sample_rate", String(prepared.sampleRate));
+  } else {
+    formData.append("file", audioBlob, "user.wav");
+  }
   formData.append("fast_mode", "1");
   formData.append("include_tts", "0");
   formData.append("include_llm", "0");
@@ -960,7 +1224,14 @@ async function buildJudgeFormData(audioBlob, includeReference = true) {
   if (includeReference && selectedTrack) {
     const referenceWavBlob = await getReferenceWavBlob(selectedTrack);
     if (referenceWavBlob) {
-      formData.append("reference_file", referenceWavBlob, "reference.wav");
+      const referenceSha256 = await getReferenceSha256(referenceWavBlob);
+      if (referenceSha256 && (await isReferenceKnown(referenceSha256))) {
+        // Server already has this exact reference; skip the upload.
+        formData.append("reference_sha256", referenceSha256);
+        formData.append("reference_url", selectedTrack.previewUrl || "");
+      } else {
+        formData.append("reference_file", referenceWavBlob, "reference.wav");
+      }
     } else {
       // Fallback when browser decode is unavailable.
       formData.append("reference_url", selectedTrack.previewUrl || "");
@@ -1002,8 +1273,12 @@ function parseJudgeError(data) {
   return { msg, isDecodeBackendIssue };
 }
 
-async function postJudge(audioBlob, includeReference = true) {
-  const formData = await buildJudgeFormData(audioBlob, includeReference);
+async function postJudge(audioBlob, includeReference = true, prepared = null) {
+  const formData = await buildJudgeFormData(
+    audioBlob,
+    includeReference,
+    prepared,
+  );
   // Using apiFetch ensures we use the correct backend URL (proxy or direct)
   return apiFetch("/api/ai/judge", {
     method: "POST",
@@ -1013,7 +1288,7 @@ async function postJudge(audioBlob, includeReference = true) {
   });
 }
 
-async function uploadAudio(audioBlob) {
+async function uploadAudio(audioBlob, prepared = null) {
   let retriedWithoutReference = false;
 
   try {
@@ -1030,7 +1305,7 @@ async function uploadAudio(audioBlob) {
       );
     }, 6000);
 
-    let response = await postJudge(audioBlob, true);
+    let response = await postJudge(audioBlob, true, prepared);
     clearTimeout(wakeUpTimer);
 
     if (!response.ok) {
@@ -1057,7 +1332,7 @@ async function uploadAudio(audioBlob) {
         retriedWithoutReference = true;
         refs.status.textContent =
           "Reference preview format unsupported. Retrying with vocal-only judging...";
-        response = await postJudge(audioBlob, false);
+        response = await postJudge(audioBlob, false, prepared);
         if (!response.ok) {
           const retryText = await response.text().catch(() => "");
           console.error(`Backend Retry Error (${response.status}):`, retryText);
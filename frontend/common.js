@@ -868,6 +868,11 @@ async function detectApiBase() {
   return null;
 }
 
+function apiSocketUrl(path) {
+  const base = resolveUrl(apiBase || window.location.origin, path);
+  return base.replace(/^http/i, "ws");
+}
+
 async function apiFetch(path, options = {}) {
   const currentOrigin = window.location.origin;
   const fallbackBases = runtimeFallbackBases(currentOrigin);
@@ -1209,4 +1214,5 @@ export {
   SAVED_TRACKS_KEY,
   CUSTOM_PLAYLIST_KEY,
   apiFetch,
+  apiSocketUrl,
 };
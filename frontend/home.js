@@ -3,7 +3,7 @@ import {
   createSongCard,
   initShell,
   setStatus,
-} from "./common.js?v=20260218m7";
+} from "./common.js?v=20260218m8";
 
 const refs = {
   songsStatus: document.querySelector("#homeSongsStatus"),
@@ -1,4 +1,4 @@
-import { createSongCard, initShell, setStatus } from "./common.js?v=20260218m7";
+import { createSongCard, initShell, setStatus } from "./common.js?v=20260218m8";
 
 const STATIC_PLAYLISTS = [
   {
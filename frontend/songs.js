@@ -5,7 +5,7 @@ import {
   setImageWithFallback,
   setStatus,
   trackKey,
-} from "./common.js?v=20260218m7";
+} from "./common.js?v=20260218m8";
 
 const refs = {
   country: document.querySelector("#songsCountry"),
@@ -6,7 +6,7 @@ import {
   normalizeTrack,
   setImageWithFallback,
   setStatus,
-} from "./common.js?v=20260218m7";
+} from "./common.js?v=20260218m8";
 
 const refs = {
   cover: document.querySelector("#trackCover"),